@@ -0,0 +1,215 @@
+"""Benchmark ingesting states of a remote instance with RemoteConnection.
+
+Starts the fake remote instance of benchmarks.fake_remote in a separate
+process, so its CPU time is not counted, and connects a RemoteConnection of
+a bare Home Assistant instance to it. Reports time, CPU and memory needed for
+the initial snapshot, then throughput, CPU per message and replication lag
+while state changes are streamed. Run from the repository root in an
+environment with Home Assistant installed:
+
+    python -m benchmarks.bench_ingest --entities 50000 --rate 5000
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import logging
+import resource
+import sys
+import tempfile
+import time
+
+from homeassistant.config_entries import ConfigEntries, ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.service import SERVICE_DESCRIPTION_CACHE
+
+from custom_components.remote_homeassistant import RemoteConnection
+from custom_components.remote_homeassistant.const import (
+    CONF_INGEST_MODE, DATA_SERVICE_ROUTER, DATA_SUPERVISOR, DOMAIN,
+    INGEST_MODE_ENTITIES, INGEST_MODE_EVENTS)
+from custom_components.remote_homeassistant.service_router import \
+    ServiceCallRouter
+from custom_components.remote_homeassistant.supervisor import \
+    ConnectionSupervisor
+
+from .fake_remote import ACCESS_TOKEN, UUID
+
+# Seconds between checks of the progress of the connection
+POLL_INTERVAL = 0.05
+# Seconds without new updates after which streaming is considered done
+IDLE_TIMEOUT = 2.0
+
+
+def _max_rss():
+    """Return peak resident memory of this process in MB."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return usage / 1e6 if sys.platform == "darwin" else usage / 1e3
+
+
+async def _async_start_fake_remote(args):
+    """Start fake remote instance process, returns it and its port."""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "benchmarks.fake_remote",
+        "--port",
+        "0",
+        "--entities",
+        str(args.entities),
+        "--rate",
+        str(args.rate),
+        "--duration",
+        str(args.duration),
+        "--wait-for-start",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+    )
+    while True:
+        line = (await process.stdout.readline()).decode()
+        if not line:
+            raise RuntimeError("fake remote instance did not start")
+        if line.startswith("port "):
+            return process, int(line.split()[1])
+
+
+async def _async_create_hass(config_dir, entry):
+    """Return a bare Home Assistant instance, able to run a RemoteConnection."""
+    hass = HomeAssistant(config_dir)
+    hass.config_entries = ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    # Known to the device registry without setting up the integration, like
+    # test helpers of Home Assistant do it
+    hass.config_entries._entries[entry.entry_id] = entry
+    await dr.async_load(hass)
+    await er.async_load(hass)
+    hass.data[SERVICE_DESCRIPTION_CACHE] = {}
+    hass.data[DOMAIN] = {
+        DATA_SERVICE_ROUTER: ServiceCallRouter(hass),
+        DATA_SUPERVISOR: ConnectionSupervisor(),
+    }
+    await hass.async_start()
+    return hass
+
+
+async def _async_wait(condition, timeout):
+    """Wait until condition is true, returns if it became true in time."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(POLL_INTERVAL)
+    return True
+
+
+async def _async_run(args):
+    process, port = await _async_start_fake_remote(args)
+    with tempfile.TemporaryDirectory() as config_dir:
+        entry = ConfigEntry(
+            version=1,
+            minor_version=1,
+            domain=DOMAIN,
+            title="benchmark",
+            data={
+                "host": "127.0.0.1",
+                "port": port,
+                "access_token": ACCESS_TOKEN,
+                "secure": False,
+                "verify_ssl": False,
+            },
+            source="user",
+            options={CONF_INGEST_MODE: args.ingest_mode},
+            unique_id=UUID,
+        )
+        hass = await _async_create_hass(config_dir, entry)
+        remote = RemoteConnection(hass, entry)
+
+        def updates_received():
+            return remote.diagnostic_counters["updates_received"]
+
+        def synced():
+            status = remote.status_attributes
+            return (
+                remote.diagnostic_counters["connected"]
+                and status["sync_total"]
+                and status["sync_processed"] == status["sync_total"]
+            )
+
+        try:
+            rss = _max_rss()
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            await remote.async_connect()
+            if not await _async_wait(synced, args.timeout):
+                raise RuntimeError("initial snapshot was not ingested in time")
+            snapshot_wall = time.perf_counter() - wall
+            snapshot_cpu = time.process_time() - cpu
+            snapshot_rss = _max_rss()
+
+            print(f"ingest mode: {args.ingest_mode}")
+            print(f"initial snapshot: {args.entities} entities")
+            print(f"  wall time       {snapshot_wall * 1e3:10.1f} ms")
+            print(f"  cpu time        {snapshot_cpu * 1e3:10.1f} ms")
+            print(f"  cpu per entity  {snapshot_cpu / args.entities * 1e6:10.1f} us")
+            print(f"  peak rss        {snapshot_rss:10.1f} MB (+{snapshot_rss - rss:.1f})")
+
+            if not args.rate:
+                return
+
+            # Streaming is held back until now, so it is measured on its own
+            baseline = updates_received()
+            cpu = time.process_time()
+            started = time.perf_counter()
+            process.stdin.write(b"start\n")
+            await process.stdin.drain()
+            first = last = None
+            count = baseline
+            while True:
+                await asyncio.sleep(POLL_INTERVAL)
+                now = time.perf_counter()
+                current = updates_received()
+                if current != count:
+                    count = current
+                    first = first or now
+                    last = now
+                elif first is not None and now - last > IDLE_TIMEOUT:
+                    break
+                elif first is None and now - started > args.timeout:
+                    raise RuntimeError("no state changes received")
+            stream_cpu = time.process_time() - cpu
+            messages = count - baseline
+            status = remote.status_attributes
+
+            print(f"state changes: {args.rate:g}/s for {args.duration:g} s")
+            print(f"  received        {messages:10d}")
+            print(f"  throughput      {messages / max(last - first, POLL_INTERVAL):10.0f} msg/s")
+            print(f"  cpu per message {stream_cpu / messages * 1e6:10.1f} us")
+            print(f"  lag p50/p99     {status.get('lag_p50')} / {status.get('lag_p99')} ms")
+            print(f"  peak rss        {_max_rss():10.1f} MB")
+        finally:
+            await remote.async_stop()
+            await hass.async_stop()
+            process.terminate()
+            await process.wait()
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=10000)
+    parser.add_argument("--rate", type=float, default=1000.0, help="state changes per second, 0 for the snapshot only")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to stream state changes")
+    parser.add_argument(
+        "--ingest-mode",
+        choices=[INGEST_MODE_ENTITIES, INGEST_MODE_EVENTS],
+        default=INGEST_MODE_ENTITIES,
+    )
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(_async_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark decoding of websocket messages with the JSON codec.
+
+Compares the codec used by RemoteConnection with the json module for a
+get_states reply and for single state_changed events. Run from the
+repository root in an environment with Home Assistant installed:
+
+    python -m benchmarks.bench_json_codec --entities 25000
+"""
+from __future__ import annotations
+import argparse
+import json
+import time
+
+from custom_components.remote_homeassistant.json_codec import (CODEC,
+                                                               json_dumps,
+                                                               json_loads)
+
+
+def _state(index):
+    """Return a synthetic state object as sent by the websocket API."""
+    return {
+        "entity_id": f"sensor.synthetic_{index}",
+        "state": str(index * 0.1),
+        "attributes": {
+            "unit_of_measurement": "W",
+            "device_class": "power",
+            "state_class": "measurement",
+            "friendly_name": f"Synthetic sensor {index}",
+        },
+        "last_changed": "2024-01-01T00:00:00.000000+00:00",
+        "last_updated": "2024-01-01T00:00:00.000000+00:00",
+        "context": {"id": "01HN0000000000000000000000", "parent_id": None, "user_id": None},
+    }
+
+
+def _state_changed(index):
+    """Return a synthetic state_changed event message."""
+    return {
+        "id": 1,
+        "type": "event",
+        "event": {
+            "event_type": "state_changed",
+            "data": {
+                "entity_id": f"sensor.synthetic_{index}",
+                "old_state": _state(index),
+                "new_state": _state(index + 1),
+            },
+            "origin": "LOCAL",
+            "time_fired": "2024-01-01T00:00:00.000000+00:00",
+            "context": {"id": "01HN0000000000000000000000", "parent_id": None, "user_id": None},
+        },
+    }
+
+
+def _time_per_message(loads, payloads, rounds):
+    """Return average seconds needed to decode one payload."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for payload in payloads:
+            loads(payload)
+        best = min(best, time.perf_counter() - start)
+    return best / len(payloads)
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=25000)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    snapshot = json_dumps(
+        {
+            "id": 1,
+            "type": "result",
+            "success": True,
+            "result": [_state(index) for index in range(args.entities)],
+        }
+    )
+    events = [json_dumps(_state_changed(index)) for index in range(args.events)]
+
+    print(f"codec: {CODEC}")
+    print(f"get_states reply: {args.entities} entities, {len(snapshot) / 1e6:.1f} MB")
+    print(f"state_changed: {args.events} events, {len(events[0])} bytes each")
+    print()
+    print(f"{'decoder':<14} {'get_states [ms]':>16} {'state_changed [us]':>19}")
+    for name, loads in (("json", json.loads), (CODEC, json_loads)):
+        snapshot_time = _time_per_message(loads, [snapshot], args.rounds)
+        event_time = _time_per_message(loads, events, args.rounds)
+        print(f"{name:<14} {snapshot_time * 1e3:>16.2f} {event_time * 1e6:>19.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Stand-in for a remote Home Assistant instance with synthetic state changes.
+
+Serves the parts of the websocket API used by RemoteConnection (auth, ping,
+get_states, get_services, call_service, subscribe_events and
+subscribe_entities) and the discovery endpoint of this integration. After a
+client subscribed, state changes of random synthetic entities are streamed to
+it at a fixed rate. Can be used by benchmarks or run on its own to connect a
+real instance to it, with the access token printed on start:
+
+    python -m benchmarks.fake_remote --entities 50000 --rate 5000 --port 8124
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from aiohttp import WSMsgType, web
+
+from custom_components.remote_homeassistant.json_codec import (json_dumps,
+                                                               json_loads)
+
+UUID = "0123456789abcdef0123456789abcdef"
+ACCESS_TOKEN = "benchmark"
+HA_VERSION = "2024.3.0"
+
+# Seconds between batches of streamed state changes
+STREAM_TICK = 0.005
+
+
+def _attributes(index):
+    """Return attributes of a synthetic entity."""
+    return {
+        "unit_of_measurement": "W",
+        "device_class": "power",
+        "state_class": "measurement",
+        "friendly_name": f"Synthetic sensor {index}",
+    }
+
+
+def _context():
+    return {"id": "01HN0000000000000000000000", "parent_id": None, "user_id": None}
+
+
+class FakeRemote:
+    """Websocket API of a remote instance with synthetic entities."""
+
+    def __init__(
+        self, entities=1000, rate=0.0, duration=10.0, delay=0.0, wait_for_start=False
+    ):
+        """Initialize a new FakeRemote instance."""
+        now = datetime.now(timezone.utc).isoformat()
+        self.states = {
+            f"sensor.synthetic_{index}": {
+                "entity_id": f"sensor.synthetic_{index}",
+                "state": str(index),
+                "attributes": _attributes(index),
+                "last_changed": now,
+                "last_updated": now,
+                "context": _context(),
+            }
+            for index in range(entities)
+        }
+        self.rate = rate
+        self.duration = duration
+        self.delay = delay
+        self.sent = 0
+        # Streaming waits for this, so it can be held back e.g. until the
+        # client ingested the initial states
+        self.started = asyncio.Event()
+        if not wait_for_start:
+            self.started.set()
+        self.port = None
+        self._runner = None
+        self._clients = set()
+
+    async def async_start(self, host="127.0.0.1", port=0):
+        """Start serving, returns the port used."""
+        app = web.Application()
+        app.router.add_get("/api/remote_homeassistant/discovery", self._discovery)
+        app.router.add_get("/api/websocket", self._websocket)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def async_disconnect(self):
+        """Close all connections, clients may connect again."""
+        for ws in list(self._clients):
+            await ws.close()
+
+    async def async_stop(self):
+        """Close all connections and stop serving."""
+        await self.async_disconnect()
+        await self._runner.cleanup()
+
+    async def _discovery(self, request):
+        return web.json_response(
+            {
+                "uuid": UUID,
+                "location_name": "Fake remote",
+                "ha_version": HA_VERSION,
+                "installation_type": "Benchmark",
+            }
+        )
+
+    async def _websocket(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        self._clients.add(ws)
+        stream = None
+        try:
+            await ws.send_str(json_dumps({"type": "auth_required", "ha_version": HA_VERSION}))
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    break
+                message = json_loads(msg.data)
+                reply = self._handle(message)
+                if reply is not None:
+                    await ws.send_str(json_dumps(reply))
+                if message.get("type") == "auth" and reply["type"] == "auth_invalid":
+                    break
+                if message.get("type") in ("subscribe_events", "subscribe_entities"):
+                    if message["type"] == "subscribe_entities":
+                        await ws.send_str(json_dumps(self._entities_snapshot(message["id"])))
+                    if stream is None and self.rate:
+                        stream = asyncio.create_task(
+                            self._stream(ws, message["id"], message["type"])
+                        )
+        finally:
+            if stream is not None:
+                stream.cancel()
+            self._clients.discard(ws)
+        return ws
+
+    def _handle(self, message):
+        """Return reply to a message."""
+        kind = message.get("type")
+        if kind == "auth":
+            if message.get("access_token") != ACCESS_TOKEN:
+                return {"type": "auth_invalid", "message": "Invalid access token"}
+            return {"type": "auth_ok", "ha_version": HA_VERSION}
+        if kind == "ping":
+            return {"id": message["id"], "type": "pong"}
+        if kind == "get_states":
+            return self._result(message, list(self.states.values()))
+        if kind == "get_services":
+            return self._result(
+                message, {"homeassistant": {"turn_on": {}, "turn_off": {}}}
+            )
+        if kind in ("call_service", "subscribe_events", "subscribe_entities"):
+            return self._result(message, None)
+        return {
+            "id": message.get("id"),
+            "type": "result",
+            "success": False,
+            "error": {"code": "unknown_command", "message": "Unknown command."},
+        }
+
+    @staticmethod
+    def _result(message, result):
+        return {"id": message["id"], "type": "result", "success": True, "result": result}
+
+    def _entities_snapshot(self, subscription):
+        """Return first subscribe_entities event, holding all states."""
+        now = time.time()
+        return {
+            "id": subscription,
+            "type": "event",
+            "event": {
+                "a": {
+                    entity_id: {"s": state["state"], "a": state["attributes"], "c": "", "lc": now}
+                    for entity_id, state in self.states.items()
+                }
+            },
+        }
+
+    def _state_changed(self, subscription, kind):
+        """Change a random entity, returns the message announcing it."""
+        entity_id = f"sensor.synthetic_{random.randrange(len(self.states))}"
+        old = self.states[entity_id]
+        new = {
+            **old,
+            "state": str(round(random.uniform(0, 1000), 1)),
+            "last_changed": datetime.now(timezone.utc).isoformat(),
+        }
+        new["last_updated"] = new["last_changed"]
+        self.states[entity_id] = new
+        if kind == "subscribe_entities":
+            event = {"c": {entity_id: {"+": {"s": new["state"], "lc": time.time()}}}}
+        else:
+            event = {
+                "event_type": "state_changed",
+                "data": {"entity_id": entity_id, "old_state": old, "new_state": new},
+                "origin": "LOCAL",
+                "time_fired": new["last_updated"],
+                "context": new["context"],
+            }
+        return {"id": subscription, "type": "event", "event": event}
+
+    async def _stream(self, ws, subscription, kind):
+        """Send state changes at the configured rate for the duration."""
+        await self.started.wait()
+        await asyncio.sleep(self.delay)
+        start = time.monotonic()
+        sent = 0
+        while not ws.closed:
+            elapsed = time.monotonic() - start
+            if elapsed >= self.duration:
+                break
+            due = int(elapsed * self.rate)
+            while sent < due:
+                await ws.send_str(json_dumps(self._state_changed(subscription, kind)))
+                sent += 1
+                self.sent += 1
+            await asyncio.sleep(STREAM_TICK)
+
+
+async def _async_serve(args):
+    remote = FakeRemote(
+        args.entities, args.rate, args.duration, args.delay, args.wait_for_start
+    )
+    port = await remote.async_start(args.host, args.port)
+    # Read by benchmarks starting this in a separate process
+    print(f"port {port}", flush=True)
+    try:
+        if args.wait_for_start:
+            await asyncio.get_running_loop().run_in_executor(None, sys.stdin.readline)
+            remote.started.set()
+        await asyncio.Event().wait()
+    finally:
+        await remote.async_stop()
+
+
+def main():
+    """Run fake remote instance."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8124)
+    parser.add_argument("--entities", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=100.0, help="state changes per second")
+    parser.add_argument("--duration", type=float, default=float("inf"), help="seconds to stream per client")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before streaming")
+    parser.add_argument(
+        "--wait-for-start",
+        action="store_true",
+        help="hold back streaming until a line is read from stdin",
+    )
+    args = parser.parse_args()
+    print(f"access token: {ACCESS_TOKEN}")
+    try:
+        asyncio.run(_async_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
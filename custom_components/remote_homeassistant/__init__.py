@@ -6,12 +6,11 @@ https://home-assistant.io/components/remote_homeassistant/
 """
 from __future__ import annotations
 import asyncio
+import cProfile
+from datetime import timedelta
 from typing import Optional
-import copy
-import fnmatch
-import inspect
 import logging
-import re
+import time
 from contextlib import suppress
 
 import aiohttp
@@ -31,28 +30,63 @@ from homeassistant.const import (CONF_ABOVE, CONF_ACCESS_TOKEN, CONF_BELOW,
                                  CONF_PORT, CONF_UNIT_OF_MEASUREMENT,
                                  CONF_VERIFY_SSL, EVENT_CALL_SERVICE,
                                  EVENT_HOMEASSISTANT_STOP, EVENT_STATE_CHANGED,
-                                 SERVICE_RELOAD)
+                                 SERVICE_RELOAD, STATE_UNAVAILABLE)
 from homeassistant.core import (Context, EventOrigin, HomeAssistant, callback,
                                 split_entity_id)
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.reload import async_integration_yaml_config
 from homeassistant.helpers.service import async_register_admin_service
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.setup import async_setup_component
-
-from custom_components.remote_homeassistant.views import DiscoveryInfoView
-
-from .const import (CONF_EXCLUDE_DOMAINS, CONF_EXCLUDE_ENTITIES,
+from homeassistant.util import dt as dt_util
+
+from custom_components.remote_homeassistant.views import DiscoveryInfoView, MetricsView
+
+from .aggregation import WindowAggregator
+from .compressed_state import (COMPRESSED_STATE_ATTRIBUTES,
+                               COMPRESSED_STATE_LAST_CHANGED,
+                               COMPRESSED_STATE_LAST_UPDATED,
+                               COMPRESSED_STATE_STATE, DIFF_ADDITIONS,
+                               ENTITY_EVENT_ADD, ENTITY_EVENT_CHANGE,
+                               ENTITY_EVENT_REMOVE, apply_state_diff)
+from .const import (AGGREGATES, ATTR_ENTRY_ID, ATTR_SECONDS, CONF_AGGREGATE,
+                    CONF_DEADBAND, CONF_DEADBAND_PERCENT,
+                    CONF_EXCLUDE_ATTRIBUTES, CONF_EXCLUDE_DOMAINS,
+                    CONF_EXCLUDE_ENTITIES, CONF_INCLUDE_ATTRIBUTES,
                     CONF_INCLUDE_DOMAINS, CONF_INCLUDE_ENTITIES,
-                    CONF_LOAD_COMPONENTS, CONF_OPTIONS, CONF_REMOTE_CONNECTION,
-                    CONF_SERVICE_PREFIX, CONF_SERVICES, CONF_UNSUB_LISTENER,
-                    DOMAIN, REMOTE_ID, DEFAULT_MAX_MSG_SIZE)
+                    CONF_INGEST_MODE, CONF_LOAD_COMPONENTS, CONF_MIN_INTERVAL,
+                    CONF_OPTIONS, CONF_RECONNECT_MODE, CONF_REMOTE_CONNECTION,
+                    CONF_SERVICE_PREFIX, CONF_SERVICES,
+                    CONF_SNAPSHOT_TIME_BUDGET, CONF_UNSUB_LISTENER,
+                    CONF_VOLATILE_ATTRIBUTES, CONF_WINDOW, CONF_WS_COMPRESSION,
+                    CONF_WS_HEARTBEAT, DATA_SERVICE_ROUTER, DATA_SUPERVISOR,
+                    DEFAULT_MAX_MSG_SIZE, DEFAULT_PROFILE_SECONDS,
+                    DEFAULT_SNAPSHOT_TIME_BUDGET, DEFAULT_WS_COMPRESSION,
+                    DOMAIN, HANDSHAKE_TIMEOUT, INGEST_MODE_ENTITIES,
+                    INGEST_MODE_EVENTS, MAX_WS_COMPRESSION, MIN_WS_COMPRESSION,
+                    RECONNECT_MODE_REMOVE, RECONNECT_MODE_UNAVAILABLE,
+                    RECONNECT_MODES, REMOTE_ID, SERVICE_CALL_LIMIT,
+                    SERVICE_PROFILE, SNAPSHOT_SAVE_DELAY, STORAGE_VERSION)
+from .filters import EntityFilter
+from .json_codec import json_dumps, json_loads
+from .latency import LatencyStats, ReplicationLag
+from .metrics import ConnectionMetrics
+from .projection import AttributeProjection
 from .proxy_services import ProxyServices
-from .rest_api import UnsupportedVersion, async_get_discovery_info
+from .rate_control import RateLimiter
+from .rest_api import (DiscoveryCache, UnsupportedVersion,
+                       async_get_discovery_info)
+from .rpc import ConnectionClosed, RpcClient
+from .service_router import ServiceCallRouter
+from .supervisor import ConnectionSupervisor
 from .debug_logger import debug_log
+from .websocket_api import TYPE_SUBSCRIBE, TYPE_TIME
+from .websocket_api import async_setup as async_setup_websocket_api
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -69,6 +103,7 @@ CONF_MAX_MSG_SIZE = "max_message_size"
 STATE_INIT = "initializing"
 STATE_CONNECTING = "connecting"
 STATE_CONNECTED = "connected"
+STATE_SYNCING = "syncing"
 STATE_AUTH_INVALID = "auth_invalid"
 STATE_AUTH_REQUIRED = "auth_required"
 STATE_RECONNECTING = "reconnecting"
@@ -77,6 +112,15 @@ STATE_DISCONNECTED = "disconnected"
 DEFAULT_ENTITY_PREFIX = ""
 DEFAULT_ENTITY_FRIENDLY_NAME_PREFIX = ""
 
+# Websocket compression, 0 or a deflate window size
+WS_COMPRESSION_SCHEMA = vol.Any(
+    0,
+    vol.All(
+        vol.Coerce(int),
+        vol.Range(min=MIN_WS_COMPRESSION, max=MAX_WS_COMPRESSION),
+    ),
+)
+
 INSTANCES_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_HOST): cv.string,
@@ -85,6 +129,10 @@ INSTANCES_SCHEMA = vol.Schema(
         vol.Optional(CONF_VERIFY_SSL, default=True): cv.boolean,
         vol.Required(CONF_ACCESS_TOKEN): cv.string,
         vol.Optional(CONF_MAX_MSG_SIZE, default=DEFAULT_MAX_MSG_SIZE): vol.Coerce(int),
+        vol.Optional(
+            CONF_WS_COMPRESSION, default=DEFAULT_WS_COMPRESSION
+        ): WS_COMPRESSION_SCHEMA,
+        vol.Optional(CONF_WS_HEARTBEAT, default=False): cv.boolean,
         vol.Optional(CONF_EXCLUDE, default={}): vol.Schema(
             {
                 vol.Optional(CONF_ENTITIES, default=[]): cv.entity_ids,
@@ -110,6 +158,27 @@ INSTANCES_SCHEMA = vol.Schema(
                         vol.Optional(CONF_UNIT_OF_MEASUREMENT): cv.string,
                         vol.Optional(CONF_ABOVE): vol.Coerce(float),
                         vol.Optional(CONF_BELOW): vol.Coerce(float),
+                        vol.Optional(CONF_MIN_INTERVAL): vol.All(
+                            vol.Coerce(float), vol.Range(min=0)
+                        ),
+                        vol.Optional(CONF_DEADBAND): vol.All(
+                            vol.Coerce(float), vol.Range(min=0)
+                        ),
+                        vol.Optional(CONF_DEADBAND_PERCENT): vol.All(
+                            vol.Coerce(float), vol.Range(min=0, max=100)
+                        ),
+                        vol.Inclusive(CONF_AGGREGATE, "aggregation"): vol.In(
+                            AGGREGATES
+                        ),
+                        vol.Inclusive(CONF_WINDOW, "aggregation"): vol.All(
+                            vol.Coerce(float), vol.Range(min=0, min_included=False)
+                        ),
+                        vol.Optional(CONF_INCLUDE_ATTRIBUTES): vol.All(
+                            cv.ensure_list, [cv.string]
+                        ),
+                        vol.Optional(CONF_EXCLUDE_ATTRIBUTES): vol.All(
+                            cv.ensure_list, [cv.string]
+                        ),
                     }
                 )
             ],
@@ -122,6 +191,16 @@ INSTANCES_SCHEMA = vol.Schema(
         vol.Optional(CONF_LOAD_COMPONENTS): cv.ensure_list,
         vol.Required(CONF_SERVICE_PREFIX, default="remote_"): cv.string,
         vol.Optional(CONF_SERVICES): cv.ensure_list,
+        vol.Optional(
+            CONF_SNAPSHOT_TIME_BUDGET, default=DEFAULT_SNAPSHOT_TIME_BUDGET
+        ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(CONF_INGEST_MODE, default=INGEST_MODE_ENTITIES): vol.In(
+            [INGEST_MODE_ENTITIES, INGEST_MODE_EVENTS]
+        ),
+        vol.Optional(CONF_RECONNECT_MODE, default=RECONNECT_MODE_REMOVE): vol.In(
+            RECONNECT_MODES
+        ),
+        vol.Optional(CONF_VOLATILE_ATTRIBUTES): vol.All(cv.ensure_list, [cv.string]),
     }
 )
 
@@ -140,6 +219,15 @@ CONFIG_SCHEMA = vol.Schema(
 
 HEARTBEAT_INTERVAL = 20
 HEARTBEAT_TIMEOUT = 5
+# Seconds between pings at most while other traffic makes them unnecessary,
+# keeps round trip times current
+HEARTBEAT_MAX_INTERVAL = 300
+# Seconds between readings of the remote clock, to correct replication lag
+CLOCK_SYNC_INTERVAL = 300
+
+# Lets the remote instance send several messages as JSON array in one frame
+TYPE_SUPPORTED_FEATURES = "supported_features"
+FEATURE_COALESCE_MESSAGES = "coalesce_messages"
 
 INTERNALLY_USED_EVENTS = [EVENT_STATE_CHANGED]
 
@@ -171,6 +259,10 @@ def async_yaml_to_config_entry(instance_conf):
         CONF_LOAD_COMPONENTS,
         CONF_SERVICE_PREFIX,
         CONF_SERVICES,
+        CONF_SNAPSHOT_TIME_BUDGET,
+        CONF_INGEST_MODE,
+        CONF_RECONNECT_MODE,
+        CONF_VOLATILE_ATTRIBUTES,
     ]:
         if option in conf:
             options[option] = conf.pop(option)
@@ -200,12 +292,14 @@ async def _async_update_config_entry_if_from_yaml(hass, entries_by_id, conf):
 
 async def setup_remote_instance(hass: HomeAssistant.core.HomeAssistant):
     """Set up remote instance-specific configurations."""
-    pass
+    async_setup_websocket_api(hass)
 
 
 async def async_setup(hass: HomeAssistant.core.HomeAssistant, config: ConfigType):
     """Set up the remote_homeassistant component."""
     hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][DATA_SERVICE_ROUTER] = ServiceCallRouter(hass)
+    hass.data[DOMAIN][DATA_SUPERVISOR] = ConnectionSupervisor()
     
     _LOGGER.info("Remote HA async_setup called")
     debug_log("=== REMOTE HA ASYNC_SETUP CALLED ===")
@@ -218,7 +312,8 @@ async def async_setup(hass: HomeAssistant.core.HomeAssistant, config: ConfigType
                  entry.entry_id, entry.unique_id, entry.title, entry.state)
     
     # Register the discovery view for all instances
-    hass.http.register_view(DiscoveryInfoView())
+    hass.http.register_view(DiscoveryInfoView(hass))
+    hass.http.register_view(MetricsView())
     debug_log("Discovery view registered")
 
     async def _handle_reload(service):
@@ -239,6 +334,18 @@ async def async_setup(hass: HomeAssistant.core.HomeAssistant, config: ConfigType
 
         await asyncio.gather(*update_tasks)
 
+    async def _handle_profile(service):
+        """Handle profile service call."""
+        entry_id = service.data[ATTR_ENTRY_ID]
+        data = hass.data[DOMAIN].get(entry_id)
+        if not isinstance(data, dict) or CONF_REMOTE_CONNECTION not in data:
+            raise HomeAssistantError(f"Config entry {entry_id} is not loaded")
+
+        path = hass.config.path(f"{DOMAIN}.{entry_id}.{int(time.time())}.prof")
+        await data[CONF_REMOTE_CONNECTION].async_profile(
+            service.data[ATTR_SECONDS], path
+        )
+
     hass.async_create_task(setup_remote_instance(hass))
 
     async_register_admin_service(hass,
@@ -247,6 +354,20 @@ async def async_setup(hass: HomeAssistant.core.HomeAssistant, config: ConfigType
         _handle_reload,
     )
 
+    async_register_admin_service(hass,
+        DOMAIN,
+        SERVICE_PROFILE,
+        _handle_profile,
+        vol.Schema(
+            {
+                vol.Required(ATTR_ENTRY_ID): cv.string,
+                vol.Optional(ATTR_SECONDS, default=DEFAULT_PROFILE_SECONDS): vol.All(
+                    vol.Coerce(float), vol.Range(min=1, max=3600)
+                ),
+            }
+        ),
+    )
+
     instances = config.get(DOMAIN, {}).get(CONF_INSTANCES, [])
     for instance in instances:
         hass.async_create_task(
@@ -277,6 +398,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         _LOGGER.info("Setting up remote connection for entry: %s", entry.entry_id)
         debug_log("Setting up MAIN instance with remote connection")
         remote = RemoteConnection(hass, entry)
+        await remote.async_restore()
 
         hass.data[DOMAIN][entry.entry_id] = {
             CONF_REMOTE_CONNECTION: remote,
@@ -315,6 +437,18 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove stored snapshot of a removed config entry."""
+    if entry.unique_id != REMOTE_ID:
+        await _snapshot_store(hass, entry).async_remove()
+
+
+@callback
+def _snapshot_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    """Return store of the mirrored states of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.snapshot.{entry.entry_id}")
+
+
 @callback
 def _async_import_options_from_yaml(hass: HomeAssistant, entry: ConfigEntry):
     """Import options from YAML into options section of config entry."""
@@ -329,6 +463,14 @@ async def _update_listener(hass, config_entry):
     await hass.config_entries.async_reload(config_entry.entry_id)
 
 
+def _frame_size(payload: str | bytes) -> int:
+    """Return size of a websocket frame payload in bytes."""
+    # Text frames are decoded by aiohttp, most are ASCII and need no encoding
+    if isinstance(payload, str) and not payload.isascii():
+        return len(payload.encode())
+    return len(payload)
+
+
 class RemoteConnection:
     """A Websocket connection to a remote home-assistant instance."""
 
@@ -340,25 +482,37 @@ class RemoteConnection:
         self._verify_ssl = config_entry.data.get(CONF_VERIFY_SSL, False)
         self._access_token = config_entry.data.get(CONF_ACCESS_TOKEN)
         self._max_msg_size = config_entry.data.get(CONF_MAX_MSG_SIZE, DEFAULT_MAX_MSG_SIZE)
-
-        # see homeassistant/components/influxdb/__init__.py
-        # for include/exclude logic
-        self._whitelist_e = set(config_entry.options.get(CONF_INCLUDE_ENTITIES, []))
-        self._whitelist_d = set(config_entry.options.get(CONF_INCLUDE_DOMAINS, []))
-        self._blacklist_e = set(config_entry.options.get(CONF_EXCLUDE_ENTITIES, []))
-        self._blacklist_d = set(config_entry.options.get(CONF_EXCLUDE_DOMAINS, []))
-
-        self._filter = [
-            {
-                CONF_ENTITY_ID: re.compile(fnmatch.translate(f.get(CONF_ENTITY_ID)))
-                if f.get(CONF_ENTITY_ID)
-                else None,
-                CONF_UNIT_OF_MEASUREMENT: f.get(CONF_UNIT_OF_MEASUREMENT),
-                CONF_ABOVE: f.get(CONF_ABOVE),
-                CONF_BELOW: f.get(CONF_BELOW),
-            }
-            for f in config_entry.options.get(CONF_FILTER, [])
-        ]
+        compression = config_entry.data.get(CONF_WS_COMPRESSION, DEFAULT_WS_COMPRESSION)
+        self._compression = (
+            min(max(compression, MIN_WS_COMPRESSION), MAX_WS_COMPRESSION)
+            if compression
+            else 0
+        )
+        self._payload_bytes_received = 0
+        self._wire_bytes_received = 0
+        self._ws_heartbeat = config_entry.data.get(CONF_WS_HEARTBEAT, False)
+        self._rtt = LatencyStats()
+        self._last_received = 0.0
+        self._last_ping = 0.0
+        self._last_clock_sync: Optional[float] = None
+        self._clock_sync_supported = True
+        self._skipped_pings = 0
+        self._lag = ReplicationLag()
+        # Totals read by the diagnostic sensors
+        self._messages_received = 0
+        self._bytes_received = 0
+        self._updates_received = 0
+        self._updates_published = 0
+        self._filtered_updates = 0
+        self._unchanged_updates = 0
+        self.metrics = ConnectionMetrics()
+        self._profiler: Optional[cProfile.Profile] = None
+        self._attempt_started = None
+
+        self._entity_filter = EntityFilter(config_entry.options)
+        self._rate_limiter = RateLimiter(hass, config_entry.options)
+        self._aggregator = WindowAggregator(hass, config_entry.options)
+        self._projection = AttributeProjection(config_entry.options)
 
         self._subscribe_events = set(
             config_entry.options.get(CONF_SUBSCRIBE_EVENTS, []) + INTERNALLY_USED_EVENTS
@@ -367,20 +521,54 @@ class RemoteConnection:
             CONF_ENTITY_PREFIX, "")
         self._entity_friendly_name_prefix = config_entry.options.get(
             CONF_ENTITY_FRIENDLY_NAME_PREFIX, "")
+        self._snapshot_time_budget = config_entry.options.get(
+            CONF_SNAPSHOT_TIME_BUDGET, DEFAULT_SNAPSHOT_TIME_BUDGET) / 1000
+        self._ingest_mode = config_entry.options.get(
+            CONF_INGEST_MODE, INGEST_MODE_ENTITIES)
+        self._reconnect_mode = config_entry.options.get(
+            CONF_RECONNECT_MODE, RECONNECT_MODE_REMOVE)
+        self._volatile_attributes = frozenset(
+            config_entry.options.get(CONF_VOLATILE_ATTRIBUTES) or [])
 
         self._connection : Optional[ClientWebSocketResponse] = None
         self._heartbeat_task = None
+        self._snapshot_task = None
         self._is_stopping = False
         self._entities = set()
         self._all_entity_names = set()
-        self._handlers = {}
-        self._remove_listener = None
+        self._local_ids: dict[str, tuple[str, str]] = {}
+        self._remote_states: dict[str, dict] = {}
+        self._registered_unique_ids: set[str] = set()
+        self._updated_during_sync: Optional[set[str]] = None
+        # Entities kept while disconnected and not yet seen again, remote
+        # entity_id to local entity_id
+        self._stale_entities: dict[str, str] = {}
+        self._store = _snapshot_store(hass, config_entry)
+        self._snapshot_save_scheduled = False
+        self._sync_total = 0
+        self._sync_processed = 0
+        self._connection_state = None
+        self._service_router = hass.data[DOMAIN][DATA_SERVICE_ROUTER]
+        self._supervisor = hass.data[DOMAIN][DATA_SUPERVISOR]
+        # Reconnects within its lifetime go straight to the websocket
+        self._discovery = DiscoveryCache(
+            hass,
+            config_entry.data[CONF_HOST],
+            config_entry.data[CONF_PORT],
+            self._secure,
+            self._access_token,
+            self._verify_ssl,
+        )
+        self._retry_attempt = 0
+        self._next_retry = None
+        self._last_error = None
+        self._handshake_done = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self.rpc = RpcClient(self._send)
         self.proxy_services = ProxyServices(hass, config_entry, self)
 
         self.set_connection_state(STATE_CONNECTING)
 
-        self.__id = 1
-
     def _prefixed_entity_id(self, entity_id):
         if self._entity_prefix:
             domain, object_id = split_entity_id(entity_id)
@@ -389,6 +577,49 @@ class RemoteConnection:
             return entity_id
         return entity_id
 
+    def _local_entity(self, entity_id):
+        """Return local entity_id and unique_id for a remote entity_id."""
+        try:
+            return self._local_ids[entity_id]
+        except KeyError:
+            pass
+        local_entity_id = self._prefixed_entity_id(entity_id)
+        unique_id = f"{self._entry.unique_id[:16]}_{local_entity_id}"
+        self._local_ids[entity_id] = (local_entity_id, unique_id)
+        return local_entity_id, unique_id
+
+    @callback
+    def _async_register_entity(self, entity_id, unique_id):
+        """Add an entity to the entity registry.
+
+        Must happen before its state is set, the registry would pick another
+        entity id otherwise. The registry debounces saving to disk, so
+        registering many entities in a row results in a single write.
+        """
+        if unique_id in self._registered_unique_ids:
+            return
+        domain, object_id = split_entity_id(entity_id)
+        er.async_get(self._hass).async_get_or_create(
+            domain=domain,
+            platform='remote_homeassistant',
+            unique_id=unique_id,
+            suggested_object_id=object_id,
+        )
+        self._registered_unique_ids.add(unique_id)
+
+    def _same_attributes(self, old, new):
+        """Return if attributes are equal, not counting volatile attributes."""
+        if not self._volatile_attributes:
+            return old == new
+        volatile = self._volatile_attributes
+        for key, value in new.items():
+            if key not in volatile and (key not in old or old[key] != value):
+                return False
+        for key in old:
+            if key not in new and key not in volatile:
+                return False
+        return True
+
     def _prefixed_entity_friendly_name(self, entity_friendly_name):
         if (self._entity_friendly_name_prefix
             and entity_friendly_name.startswith(self._entity_friendly_name_prefix)
@@ -417,8 +648,88 @@ class RemoteConnection:
  
     def set_connection_state(self, state):
         """Change current connection state."""
+        self._connection_state = state
+        if state not in (STATE_CONNECTING, STATE_RECONNECTING):
+            # Authenticated, rejected or disconnected, the handshake is over
+            self._handshake_done.set()
+        self._async_update_status()
+
+    @callback
+    def _async_update_status(self):
+        """Notify status sensor about a changed state or attributes."""
         signal = f"remote_homeassistant_{self._entry.unique_id}"
-        async_dispatcher_send(self._hass, signal, state)
+        async_dispatcher_send(self._hass, signal, self._connection_state)
+
+    @property
+    def status_attributes(self):
+        """Return connection details shown by the status sensor."""
+        attributes = {
+            "sync_processed": self._sync_processed,
+            "sync_total": self._sync_total,
+            "stale_entities": len(self._stale_entities),
+            "retry_attempt": self._retry_attempt,
+            "next_retry": self._next_retry,
+            "last_error": self._last_error,
+            "compression": self._connection.compress if self._connection else 0,
+            "pending_requests": self.rpc.pending,
+            "timed_out_requests": self.rpc.timed_out,
+            "suppressed_updates": self._rate_limiter.suppressed,
+            "aggregated_updates": self._aggregator.aggregated,
+            "attribute_bytes_saved": self._projection.bytes_saved,
+            "skipped_pings": self._skipped_pings,
+        }
+        if self._rtt:
+            attributes["rtt_min"] = self._rtt.min
+            attributes["rtt_avg"] = self._rtt.avg
+            attributes["rtt_p95"] = self._rtt.percentile(95)
+        if self._lag.total:
+            attributes.update(self._lag.summary())
+        if self._wire_bytes_received:
+            attributes["compression_ratio"] = round(
+                self._payload_bytes_received / self._wire_bytes_received, 2
+            )
+        return attributes
+
+    @property
+    def diagnostic_counters(self):
+        """Return totals counted since setup and current figures.
+
+        Shown by diagnostic sensors and served as metrics.
+        """
+        return {
+            "reconnects": self.metrics.reconnects,
+            "connected": int(self._connection_state == STATE_CONNECTED),
+            "messages_received": self._messages_received,
+            "bytes_received": self._bytes_received,
+            "updates_received": self._updates_received,
+            "updates_published": self._updates_published,
+            "filtered_updates": self._filtered_updates,
+            "aggregated_updates": self._aggregator.aggregated,
+            "suppressed_updates": self._rate_limiter.suppressed,
+            "unchanged_updates": self._unchanged_updates,
+            "pending_requests": self.rpc.pending,
+        }
+
+    def _count_wire_bytes(self):
+        """Count bytes received from the socket, used for compression ratio.
+
+        aiohttp has no public counter for this, so the protocol of the
+        connection is wrapped. If that is not possible, no ratio is reported.
+        """
+        self._payload_bytes_received = 0
+        self._wire_bytes_received = 0
+        protocol = getattr(getattr(self._connection, "_conn", None), "protocol", None)
+        if protocol is None:
+            return
+
+        data_received = protocol.data_received
+
+        def _data_received(data):
+            self._wire_bytes_received += len(data)
+            data_received(data)
+
+        with suppress(AttributeError, TypeError):
+            protocol.data_received = _data_received
 
     @callback
     def _get_url(self):
@@ -439,14 +750,7 @@ class RemoteConnection:
         async def _async_instance_get_info():
             """Fetch discovery info from remote instance."""
             try:
-                return await async_get_discovery_info(
-                    self._hass,
-                    self._entry.data[CONF_HOST],
-                    self._entry.data[CONF_PORT],
-                    self._secure,
-                    self._access_token,
-                    self._verify_ssl,
-                )
+                return await self._discovery.async_get()
             except OSError:
                 _LOGGER.exception("failed to connect")
             except UnsupportedVersion:
@@ -474,27 +778,80 @@ class RemoteConnection:
         session = async_get_clientsession(self._hass, self._verify_ssl)
         self.set_connection_state(STATE_CONNECTING)
 
-        while True:
-            info = await _async_instance_get_info()
-
-            # Verify we are talking to correct instance
-            if not _async_instance_id_match(info):
+        while not self._is_stopping:
+            if self._retry_attempt:
+                delay = self._supervisor.backoff(self._retry_attempt)
+                self._next_retry = dt_util.utcnow() + timedelta(seconds=delay)
                 self.set_connection_state(STATE_RECONNECTING)
-                await asyncio.sleep(10)
-                continue
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._stopped.wait(), delay)
+                if self._is_stopping:
+                    return
+                self._next_retry = None
+            # Reset once authenticated, so connections dropped before that
+            # back off as well
+            self._retry_attempt += 1
+            self._attempt_started = time.monotonic()
+
+            # Only a limited number of connections do their handshake at once,
+            # the whole attempt is limited so unresponsive instances cannot
+            # keep a slot
+            connected = False
+            async with self._supervisor.handshake():
+                try:
+                    async with asyncio.timeout(HANDSHAKE_TIMEOUT):
+                        connected = await self._async_handshake(
+                            session,
+                            url,
+                            _async_instance_get_info,
+                            _async_instance_id_match,
+                        )
+                        if connected:
+                            self._hass.bus.async_listen_once(
+                                EVENT_HOMEASSISTANT_STOP, _async_stop_handler
+                            )
+                            # Keep the slot until authentication is done
+                            await self._handshake_done.wait()
+                except asyncio.TimeoutError:
+                    if not connected:
+                        _LOGGER.error("Connecting to %s timed out, retrying", url)
+                        self._last_error = "handshake timed out"
+            if connected:
+                return
 
-            try:
-                _LOGGER.info("Connecting to %s", url)
-                self._connection = await session.ws_connect(url, max_msg_size = self._max_msg_size)
-            except aiohttp.client_exceptions.ClientError:
-                _LOGGER.error("Could not connect to %s, retry in 10 seconds...", url)
-                self.set_connection_state(STATE_RECONNECTING)
-                await asyncio.sleep(10)
-            else:
-                _LOGGER.info("Connected to home-assistant websocket at %s", url)
-                break
+    async def _async_handshake(self, session, url, get_info, id_match):
+        """Try to connect once, returns if the websocket is connected."""
+        info = await get_info()
 
-        self._hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop_handler)
+        # Verify we are talking to correct instance
+        if not id_match(info):
+            self._last_error = "discovery failed"
+            self._discovery.invalidate()
+            return False
+
+        try:
+            _LOGGER.info("Connecting to %s", url)
+            self._connection = await session.ws_connect(
+                url,
+                max_msg_size=self._max_msg_size,
+                compress=self._compression,
+                # aiohttp closes the connection if a pong is missing
+                heartbeat=HEARTBEAT_INTERVAL if self._ws_heartbeat else None,
+            )
+        except aiohttp.client_exceptions.ClientError as err:
+            _LOGGER.error("Could not connect to %s, retrying: %s", url, err)
+            self._last_error = str(err)
+            # The remote instance may have been replaced at this address
+            self._discovery.invalidate()
+            return False
+
+        _LOGGER.info("Connected to home-assistant websocket at %s", url)
+        self._count_wire_bytes()
+        self._rtt.clear()
+        # The remote instance may have changed, e.g. been updated
+        self._lag.clear_clock()
+        self._last_clock_sync = None
+        self._clock_sync_supported = True
 
         device_registry = dr.async_get(self._hass)
         device_registry.async_get_or_create(
@@ -506,82 +863,246 @@ class RemoteConnection:
             sw_version=info.get("ha_version"),
         )
 
+        self._handshake_done.clear()
         asyncio.ensure_future(self._recv())
-        self._heartbeat_task = self._hass.loop.create_task(self._heartbeat_loop())
+        return True
 
     async def _heartbeat_loop(self):
         """Send periodic heartbeats to remote instance."""
+        # Heartbeats of all connections are spread over the interval
+        await asyncio.sleep(self._supervisor.heartbeat_offset(HEARTBEAT_INTERVAL))
         while self._connection is not None and not self._connection.closed:
-            await asyncio.sleep(HEARTBEAT_INTERVAL)
-
-            _LOGGER.debug("Sending ping")
-            event = asyncio.Event()
+            now = time.monotonic()
+            if self._ws_heartbeat:
+                # Pings are sent by aiohttp, only the status is updated here
+                pass
+            elif (
+                now - self._last_received < HEARTBEAT_INTERVAL
+                and now - self._last_ping < HEARTBEAT_MAX_INTERVAL
+            ):
+                # Received messages already show the connection is alive
+                self._skipped_pings += 1
+            else:
+                _LOGGER.debug("Sending ping")
+                self._last_ping = now
+                try:
+                    message = await self.rpc.request(
+                        {"type": "ping"}, HEARTBEAT_TIMEOUT, limited=False
+                    )
+                except asyncio.TimeoutError:
+                    _LOGGER.warning("heartbeat failed")
+
+                    # Schedule closing on event loop to avoid deadlock
+                    asyncio.ensure_future(self._connection.close())
+                    break
+                except ConnectionClosed:
+                    break
 
-            def resp(message):
+                self._rtt.add(time.monotonic() - now)
                 _LOGGER.debug("Got pong: %s", message)
-                event.set()
-
-            await self.call(resp, "ping")
-
-            try:
-                await asyncio.wait_for(event.wait(), HEARTBEAT_TIMEOUT)
-            except asyncio.TimeoutError:
-                _LOGGER.warning("heartbeat failed")
+            if self._clock_sync_supported and (
+                self._last_clock_sync is None
+                or now - self._last_clock_sync >= CLOCK_SYNC_INTERVAL
+            ):
+                try:
+                    await self._async_sync_clock()
+                except asyncio.TimeoutError:
+                    _LOGGER.debug("Reading remote clock timed out")
+                except ConnectionClosed:
+                    break
+            self._async_update_status()
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
 
-                # Schedule closing on event loop to avoid deadlock
-                asyncio.ensure_future(self._connection.close())
-                break
+    async def _async_sync_clock(self):
+        """Read clock of the remote instance to measure their offset."""
+        self._last_clock_sync = time.monotonic()
+        sent = time.time()
+        message = await self.rpc.request(
+            {"type": TYPE_TIME}, HEARTBEAT_TIMEOUT, limited=False
+        )
+        received = time.time()
+        if not message["success"]:
+            # Remote instance does not run this integration, its clock is
+            # assumed to be in sync
+            _LOGGER.debug("Cannot read remote clock: %s", message["error"])
+            self._clock_sync_supported = False
+            return
+        self._lag.add_clock_reading(sent, message["result"]["time"], received)
 
     async def async_stop(self):
         """Close connection."""
         self._is_stopping = True
+        self._stopped.set()
+        if self._reconnect_mode != RECONNECT_MODE_REMOVE:
+            # Entities are removed once closed, store them before
+            await self._store.async_save(self._snapshot_data())
         if self._connection is not None:
             await self._connection.close()
+        else:
+            self._async_remove_entities()
         await self.proxy_services.unload()
 
-    def _next_id(self):
-        _id = self.__id
-        self.__id += 1
-        return _id
+    async def async_restore(self):
+        """Publish mirrored states stored when last running.
+
+        They are treated like entities kept while disconnected, so they are
+        reconciled with the snapshot received once connected.
+        """
+        if self._reconnect_mode == RECONNECT_MODE_REMOVE:
+            return
+
+        data = await self._store.async_load()
+        if not data:
+            return
+
+        for remote_entity_id, state, attr in data["entities"]:
+            entity_id, unique_id = self._local_entity(remote_entity_id)
+            self._async_register_entity(entity_id, unique_id)
+            if self._reconnect_mode == RECONNECT_MODE_UNAVAILABLE:
+                state = STATE_UNAVAILABLE
+            self._hass.states.async_set(entity_id, state, attr)
+            self._entities.add(entity_id)
+            self._service_router.async_add(entity_id, remote_entity_id, self)
+            self._stale_entities[remote_entity_id] = entity_id
 
-    async def call(self, handler, message_type, **extra_args) -> None:
-        if self._connection is None:
-            _LOGGER.error("No remote websocket connection")
+    @callback
+    def _async_schedule_snapshot_save(self):
+        """Store mirrored states after they changed, at most once per delay."""
+        if (
+            self._reconnect_mode == RECONNECT_MODE_REMOVE
+            or self._snapshot_save_scheduled
+        ):
             return
+        self._snapshot_save_scheduled = True
+        self._store.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _snapshot_data(self):
+        """Return mirrored states to store."""
+        self._snapshot_save_scheduled = False
+        entities = []
+        for remote_entity_id, (entity_id, _) in self._local_ids.items():
+            if entity_id not in self._entities:
+                continue
+            state = self._hass.states.get(entity_id)
+            if state is not None:
+                entities.append(
+                    [remote_entity_id, state.state, dict(state.attributes)]
+                )
+        return {"entities": entities}
+
+    @callback
+    def _async_remove_entities(self):
+        """Remove all published entities."""
+        for entity in self._entities:
+            self._hass.states.async_remove(entity)
+            self._service_router.async_remove(entity)
+        self._entities = set()
+        self._stale_entities = {}
+
+    async def _send(self, message) -> None:
+        """Send a message, used by the RPC client."""
+        connection = self._connection
+        if connection is None or connection.closed:
+            raise ConnectionClosed("No remote websocket connection")
 
-        _id = self._next_id()
-        self._handlers[_id] = handler
         try:
-            await self._connection.send_json(
-                {"id": _id, "type": message_type, **extra_args}
-            )
-        except aiohttp.client_exceptions.ClientError as err:
+            await connection.send_json(message, dumps=json_dumps)
+        except (aiohttp.client_exceptions.ClientError, ConnectionResetError) as err:
             _LOGGER.error("remote websocket connection closed: %s", err)
-            await self._disconnected()
+            # Receiving ends once closed and handles the disconnect
+            await connection.close()
+            raise ConnectionClosed(str(err)) from err
 
     async def _disconnected(self):
-        # Remove all published entries
-        for entity in self._entities:
-            self._hass.states.async_remove(entity)
+        self._connection = None
+        self.rpc.reset()
+        self._rate_limiter.async_stop()
+        self._aggregator.async_stop()
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            self._snapshot_task = None
+        if self._is_stopping or self._reconnect_mode == RECONNECT_MODE_REMOVE:
+            self._async_remove_entities()
+        else:
+            self._keep_entities()
         if self._heartbeat_task is not None:
             self._heartbeat_task.cancel()
             try:
                 await self._heartbeat_task
             except asyncio.CancelledError:
                 pass
-        if self._remove_listener is not None:
-            self._remove_listener()
 
         self.set_connection_state(STATE_DISCONNECTED)
         self._heartbeat_task = None
-        self._remove_listener = None
-        self._entities = set()
         self._all_entity_names = set()
+        self._remote_states = {}
         if not self._is_stopping:
+            self.metrics.reconnects += 1
             asyncio.ensure_future(self.async_connect())
 
+    @callback
+    def _keep_entities(self):
+        """Keep published entities while reconnecting.
+
+        They are reconciled with the snapshot received after reconnecting,
+        so only entities that changed are written and only entities that are
+        gone are removed.
+        """
+        self._stale_entities = {
+            remote_entity_id: entity_id
+            for remote_entity_id, (entity_id, _) in self._local_ids.items()
+            if entity_id in self._entities
+        }
+        if self._reconnect_mode != RECONNECT_MODE_UNAVAILABLE:
+            return
+
+        for entity_id in self._entities:
+            state = self._hass.states.get(entity_id)
+            if state is not None and state.state != STATE_UNAVAILABLE:
+                self._hass.states.async_set(
+                    entity_id, STATE_UNAVAILABLE, state.attributes
+                )
+
+    async def async_profile(self, seconds, path):
+        """Profile handling of received messages and write stats to path.
+
+        Only time spent on messages of this connection is profiled, the
+        profiler is paused while waiting for the next message.
+        """
+        if self._profiler is not None:
+            raise HomeAssistantError("Profiling is already running")
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as err:
+            # Another profiler is active
+            raise HomeAssistantError(f"Cannot start profiling: {err}") from err
+        profiler.disable()
+
+        _LOGGER.info("Profiling %s for %s seconds", self._get_url(), seconds)
+        self._profiler = profiler
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self._profiler = None
+            profiler.disable()
+        await self._hass.async_add_executor_job(profiler.dump_stats, path)
+        _LOGGER.info("Profiling stats written to %s", path)
+
+    @callback
+    def _async_profile_resume(self):
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    @callback
+    def _async_profile_pause(self):
+        if self._profiler is not None:
+            self._profiler.disable()
+
     async def _recv(self):
         while self._connection is not None and not self._connection.closed:
+            self._async_profile_pause()
             try:
                 data = await self._connection.receive()
             except aiohttp.client_exceptions.ClientError as err:
@@ -605,19 +1126,48 @@ class RemoteConnection:
                     _LOGGER.error(f"please consider increasing message size with `{CONF_MAX_MSG_SIZE}`")
                 break
 
+            self._async_profile_resume()
+            self._last_received = time.monotonic()
+            size = _frame_size(data.data)
+            self._payload_bytes_received += size
+            self._bytes_received += size
+            self.metrics.frame_bytes.observe(size)
+            started = time.perf_counter()
             try:
-                message = data.json()
-            except TypeError as err:
+                message = data.json(loads=json_loads)
+            except (TypeError, ValueError) as err:
                 _LOGGER.error("could not decode data (%s) as json: %s", data, err)
                 break
+            self.metrics.decode_seconds.observe(time.perf_counter() - started)
 
             if message is None:
                 break
 
             _LOGGER.debug("received: %s", message)
 
+            if isinstance(message, list):
+                # Coalesced frame, only results and events are batched
+                self._messages_received += len(message)
+                for item in message:
+                    await self.rpc.dispatch(item)
+                continue
+            self._messages_received += 1
+
             if message["type"] == api.TYPE_AUTH_OK:
+                if self._attempt_started is not None:
+                    self.metrics.handshake_seconds.observe(
+                        time.monotonic() - self._attempt_started
+                    )
+                    self._attempt_started = None
+                self._retry_attempt = 0
+                self._last_error = None
                 self.set_connection_state(STATE_CONNECTED)
+                # Requests sent before authentication are rejected
+                if self._heartbeat_task is None:
+                    self._heartbeat_task = self._hass.loop.create_task(
+                        self._heartbeat_loop()
+                    )
+                await self._negotiate_features()
                 await self._init()
 
             elif message["type"] == api.TYPE_AUTH_REQUIRED:
@@ -628,7 +1178,7 @@ class RemoteConnection:
                     self.set_connection_state(STATE_AUTH_REQUIRED)
                     return
                 try:
-                    await self._connection.send_json(json_data)
+                    await self._connection.send_json(json_data, dumps=json_dumps)
                 except Exception as err:
                     _LOGGER.error("could not send data to remote connection: %s", err)
                     break
@@ -640,129 +1190,82 @@ class RemoteConnection:
                 return
 
             else:
-                handler = self._handlers.get(message["id"])
-                if handler is not None:
-                    if inspect.iscoroutinefunction(handler):
-                        await handler(message)
-                    else:
-                        handler(message)
+                await self.rpc.dispatch(message)
 
         await self._disconnected()
 
-    async def _init(self):
-        async def forward_event(event):
-            """Send local event to remote instance.
-
-            The affected entity_id has to originate from that remote instance,
-            otherwise the event is discarded.
-            """
-            event_data = event.data
-            service_data = event_data["service_data"]
-
-            if not service_data:
-                return
-
-            entity_ids = service_data.get("entity_id", None)
-
-            if not entity_ids:
-                return
-
-            if isinstance(entity_ids, str):
-                entity_ids = (entity_ids.lower(),)
-
-            entities = {entity_id.lower() for entity_id in self._entities}
-
-            entity_ids = entities.intersection(entity_ids)
-
-            if not entity_ids:
-                return
-
-            if self._entity_prefix:
+    async def _negotiate_features(self):
+        """Ask the remote instance to batch messages sent in a burst.
 
-                def _remove_prefix(entity_id):
-                    domain, object_id = split_entity_id(entity_id)
-                    object_id = object_id.replace(self._entity_prefix.lower(), "", 1)
-                    return domain + "." + object_id
-
-                entity_ids = {_remove_prefix(entity_id) for entity_id in entity_ids}
-
-            event_data = copy.deepcopy(event_data)
-            event_data["service_data"]["entity_id"] = list(entity_ids)
+        Must be the first message after authentication. Versions without
+        support for it reply with an error, which is ignored. The reply is
+        not awaited since this runs in the receive loop.
+        """
+        await self.rpc.send(
+            {
+                "type": TYPE_SUPPORTED_FEATURES,
+                "features": {FEATURE_COALESCE_MESSAGES: 1},
+            },
+        )
 
-            # Remove service_call_id parameter - websocket API
-            # doesn't accept that one
-            event_data.pop("service_call_id", None)
+    async def async_forward_service_call(self, event_data, entity_ids):
+        """Call a service on the remote instance for some of its entities."""
+        # Remove service_call_id parameter - websocket API
+        # doesn't accept that one
+        data = {
+            key: value
+            for key, value in event_data.items()
+            if key != "service_call_id"
+        }
+        data["type"] = EVENT_CALL_SERVICE
+        data["service_data"] = {**event_data["service_data"], "entity_id": entity_ids}
 
-            _id = self._next_id()
-            data = {"id": _id, "type": event.event_type, **event_data}
+        _LOGGER.debug("forward event: %s", data)
 
-            _LOGGER.debug("forward event: %s", data)
-            
-            if self._connection is None:
-                _LOGGER.error("There is no remote connecion to send send data to")
-                return
-            try:
-                await self._connection.send_json(data)
-            except Exception as err:
-                _LOGGER.error("could not send data to remote connection: %s", err)
-                await self._disconnected()
+        try:
+            message = await self.rpc.request(data, SERVICE_CALL_LIMIT)
+        except (ConnectionClosed, asyncio.TimeoutError) as err:
+            _LOGGER.error("could not forward service call to remote connection: %r", err)
+            return
+        if not message["success"]:
+            _LOGGER.warning(
+                "Remote service call %s.%s failed: %s",
+                event_data["domain"],
+                event_data["service"],
+                message["error"]["message"],
+            )
 
+    async def _init(self):
         def state_changed(entity_id, state, attr):
             """Publish remote state change on local instance."""
-            domain, _object_id = split_entity_id(entity_id)
-
             self._all_entity_names.add(entity_id)
+            self._updates_received += 1
+            if self._stale_entities:
+                self._stale_entities.pop(entity_id, None)
+
+            started = time.perf_counter()
+            if not self._entity_filter.accepts(entity_id, state, attr):
+                self._filtered_updates += 1
+                accepted = False
+            else:
+                accepted = self._aggregator.accepts(
+                    entity_id, state, attr
+                ) and self._rate_limiter.accepts(entity_id, state, attr)
+            self.metrics.filter_seconds.observe(time.perf_counter() - started)
 
-            if entity_id in self._blacklist_e or domain in self._blacklist_d:
-                return
+            if accepted:
+                publish_state(entity_id, state, attr)
 
-            if (
-                (self._whitelist_e or self._whitelist_d)
-                and entity_id not in self._whitelist_e
-                and domain not in self._whitelist_d
-            ):
-                return
+        def publish_state(entity_id, state, attr):
+            """Write remote state to the local state machine."""
+            started = time.perf_counter()
+            attr = self._projection.project(entity_id, attr)
+            remote_entity_id = entity_id
+            entity_id, unique_id = self._local_entity(entity_id)
 
-            for f in self._filter:
-                if f[CONF_ENTITY_ID] and not f[CONF_ENTITY_ID].match(entity_id):
-                    continue
-                if f[CONF_UNIT_OF_MEASUREMENT]:
-                    if CONF_UNIT_OF_MEASUREMENT not in attr:
-                        continue
-                    if f[CONF_UNIT_OF_MEASUREMENT] != attr[CONF_UNIT_OF_MEASUREMENT]:
-                        continue
-                try:
-                    if f[CONF_BELOW] and float(state) < f[CONF_BELOW]:
-                        _LOGGER.info(
-                            "%s: ignoring state '%s', because below '%s'",
-                            entity_id,
-                            state,
-                            f[CONF_BELOW],
-                        )
-                        return
-                    if f[CONF_ABOVE] and float(state) > f[CONF_ABOVE]:
-                        _LOGGER.info(
-                            "%s: ignoring state '%s', because above '%s'",
-                            entity_id,
-                            state,
-                            f[CONF_ABOVE],
-                        )
-                        return
-                except ValueError:
-                    pass
-
-            entity_id = self._prefixed_entity_id(entity_id)
-
-            # Add local unique id
-            domain, object_id = split_entity_id(entity_id)
-            attr['unique_id'] = f"{self._entry.unique_id[:16]}_{entity_id}"
-            entity_registry = er.async_get(self._hass)
-            entity_registry.async_get_or_create(
-                domain=domain,
-                platform='remote_homeassistant',
-                unique_id=attr['unique_id'],
-                suggested_object_id=object_id,
-            )
+            # Add local unique id, registry is only touched for new entities
+            attr['unique_id'] = unique_id
+            self._async_register_entity(entity_id, unique_id)
 
             # Add local customization data
             if DATA_CUSTOMIZE in self._hass.data:
@@ -774,8 +1277,41 @@ class RemoteConnection:
                 if attrId == "entity_picture":
                     attr[attrId] = self._full_picture_url(value)
 
-            self._entities.add(entity_id)
+            if entity_id not in self._entities:
+                self._entities.add(entity_id)
+                self._service_router.async_add(entity_id, remote_entity_id, self)
+
+            # Skip writes not changing anything that matters, e.g. after a
+            # resync or when only volatile attributes changed
+            current = self._hass.states.get(entity_id)
+            if (
+                current is not None
+                and current.state == state
+                and self._same_attributes(current.attributes, attr)
+            ):
+                self._unchanged_updates += 1
+                self.metrics.apply_seconds.observe(time.perf_counter() - started)
+                return
+
             self._hass.states.async_set(entity_id, state, attr)
+            self._updates_published += 1
+            self._async_schedule_snapshot_save()
+            self.metrics.apply_seconds.observe(time.perf_counter() - started)
+
+        def entity_removed(entity_id):
+            """Remove local state of entity removed in the remote instance."""
+            self._entity_filter.forget(entity_id)
+            self._rate_limiter.async_forget(entity_id)
+            self._aggregator.async_forget(entity_id)
+            self._projection.forget(entity_id)
+            entity_id, _ = self._local_entity(entity_id)
+            with suppress(ValueError, AttributeError, KeyError):
+                self._entities.remove(entity_id)
+            self._service_router.async_remove(entity_id)
+            with suppress(ValueError, AttributeError, KeyError):
+                self._all_entity_names.remove(entity_id)
+            self._hass.states.async_remove(entity_id)
+            self._async_schedule_snapshot_save()
 
         def fire_event(message):
             """Publish remote event on local instance."""
@@ -788,14 +1324,17 @@ class RemoteConnection:
             if message["event"]["event_type"] == "state_changed":
                 data = message["event"]["data"]
                 entity_id = data["entity_id"]
+                time_fired = dt_util.parse_datetime(
+                    message["event"].get("time_fired") or ""
+                )
+                if time_fired is not None:
+                    self._lag.add(entity_id, time_fired.timestamp())
+                if self._updated_during_sync is not None:
+                    # Newer than the snapshot being ingested, which must not
+                    # overwrite it
+                    self._updated_during_sync.add(entity_id)
                 if not data["new_state"]:
-                    entity_id = self._prefixed_entity_id(entity_id)
-                    # entity was removed in the remote instance
-                    with suppress(ValueError, AttributeError, KeyError):
-                        self._entities.remove(entity_id)
-                    with suppress(ValueError, AttributeError, KeyError):
-                        self._all_entity_names.remove(entity_id)
-                    self._hass.states.async_remove(entity_id)
+                    entity_removed(entity_id)
                     return
 
                 state = data["new_state"]["state"]
@@ -814,27 +1353,216 @@ class RemoteConnection:
                     origin=EventOrigin.remote,
                 )
 
-        def got_states(message):
-            """Called when list of remote states is available."""
-            for entity in message["result"]:
-                entity_id = entity["entity_id"]
-                state = entity["state"]
-                attributes = entity["attributes"]
-                for attr, value in attributes.items():
-                    if attr == "friendly_name":
-                        attributes[attr] = self._prefixed_entity_friendly_name(value)
-                    if attr == "entity_picture":
-                        attributes[attr] = self._full_picture_url(value)
-
-                state_changed(entity_id, state, attributes)
-
-        self._remove_listener = self._hass.bus.async_listen(
-            EVENT_CALL_SERVICE, forward_event
-        )
+        async def ingest_states(states):
+            """Publish snapshot of remote states in chunks.
+
+            Control is given back to the event loop whenever the time budget of
+            a chunk is used up, so large snapshots don't stall heartbeats and
+            other work. Events received in between are newer than the snapshot
+            and take precedence.
+            """
+            self._sync_total = len(states)
+            self._sync_processed = 0
+            self._updated_during_sync = set()
+            self.set_connection_state(STATE_SYNCING)
+
+            self._async_profile_resume()
+            try:
+                deadline = time.monotonic() + self._snapshot_time_budget
+                for index, (entity_id, state, attr) in enumerate(states):
+                    if entity_id not in self._updated_during_sync:
+                        state_changed(entity_id, state, attr)
+
+                    if time.monotonic() >= deadline:
+                        self._sync_processed = index + 1
+                        self._async_update_status()
+                        self._async_profile_pause()
+                        await asyncio.sleep(0)
+                        self._async_profile_resume()
+                        deadline = time.monotonic() + self._snapshot_time_budget
+            finally:
+                self._updated_during_sync = None
+                self._async_profile_pause()
+
+            # Entities kept while disconnected but missing in the snapshot
+            # are gone
+            stale, self._stale_entities = self._stale_entities, {}
+            for entity_id in stale:
+                entity_removed(entity_id)
+
+            self._sync_processed = self._sync_total
+            self._snapshot_task = None
+            self.set_connection_state(STATE_CONNECTED)
+
+        async def fetch_states():
+            """Fetch list of remote states and publish it."""
+            try:
+                message = await self.rpc.request({"type": "get_states"}, None)
+            except ConnectionClosed:
+                return
+            if not message["success"]:
+                _LOGGER.error("Could not fetch remote states: %s", message["error"]["message"])
+                return
+            states = [
+                (entity["entity_id"], entity["state"], entity["attributes"])
+                for entity in message["result"]
+            ]
+            await ingest_states(states)
+
+        async def subscribe_state_changed():
+            """Subscribe to full state changes and fetch all states."""
+            await self.rpc.subscribe(
+                fire_event,
+                {"type": "subscribe_events", "event_type": EVENT_STATE_CHANGED},
+            )
+            # Not awaited, the reply is read by the receive loop this may run in
+            self._snapshot_task = self._hass.async_create_task(fetch_states())
+
+        def entity_added(entity_id, compressed):
+            """Cache compressed state of a new remote entity.
+
+            Returns False if the entity is excluded, its changes are not
+            needed then and it is not cached.
+            """
+            self._all_entity_names.add(entity_id)
+            if not self._entity_filter.is_included(entity_id):
+                return False
+            if snapshot_received:
+                stamp_lag(entity_id, compressed)
+            compressed.setdefault(COMPRESSED_STATE_ATTRIBUTES, {})
+            self._remote_states[entity_id] = compressed
+            return True
+
+        snapshot_received = False
+
+        def stamp_lag(entity_id, fields):
+            """Measure lag of an update from its compressed timestamps."""
+            timestamp = fields.get(
+                COMPRESSED_STATE_LAST_UPDATED,
+                fields.get(COMPRESSED_STATE_LAST_CHANGED),
+            )
+            if timestamp is not None:
+                self._lag.add(entity_id, timestamp)
+
+        async def subscribe_entities():
+            """Subscribe to compressed states and diffs of all entities."""
+            await self.rpc.subscribe(entities_changed, {"type": "subscribe_entities"})
+
+        async def filtered_entities_changed(message):
+            """Handle compressed states filtered by a remote node."""
+            if message["type"] == "result":
+                if not message["success"]:
+                    _LOGGER.info(
+                        "Remote instance does not support %s (%s), "
+                        "falling back to subscribe_entities",
+                        TYPE_SUBSCRIBE,
+                        message["error"].get("message"),
+                    )
+                    await subscribe_entities()
+                else:
+                    self._all_entity_names.update(message["result"]["entity_ids"])
+                return
+
+            await entities_changed(message)
+
+        async def entities_changed(message):
+            """Rebuild full remote states from compressed states and diffs."""
+            nonlocal snapshot_received
+            if message["type"] == "result":
+                if not message["success"]:
+                    _LOGGER.info(
+                        "Remote instance does not support subscribe_entities "
+                        "(%s), falling back to state_changed events",
+                        message["error"].get("message"),
+                    )
+                    await subscribe_state_changed()
+                return
+
+            if message["type"] != "event":
+                return
+
+            event = message["event"]
+
+            # The first event holds the initial snapshot, it is sent even if
+            # no entity exists
+            added = event.get(ENTITY_EVENT_ADD)
+            if added is not None:
+                states = [
+                    (
+                        entity_id,
+                        compressed[COMPRESSED_STATE_STATE],
+                        dict(compressed[COMPRESSED_STATE_ATTRIBUTES]),
+                    )
+                    for entity_id, compressed in added.items()
+                    if entity_added(entity_id, compressed)
+                ]
+                if not snapshot_received:
+                    snapshot_received = True
+                    self._snapshot_task = self._hass.async_create_task(
+                        ingest_states(states)
+                    )
+                else:
+                    for entity_id, state, attr in states:
+                        if self._updated_during_sync is not None:
+                            self._updated_during_sync.add(entity_id)
+                        state_changed(entity_id, state, attr)
+
+            changed = event.get(ENTITY_EVENT_CHANGE)
+            if changed:
+                for entity_id, diff in changed.items():
+                    compressed = self._remote_states.get(entity_id)
+                    if compressed is None:
+                        continue
+                    apply_state_diff(compressed, diff)
+                    stamp_lag(entity_id, diff.get(DIFF_ADDITIONS) or {})
+                    if self._updated_during_sync is not None:
+                        self._updated_during_sync.add(entity_id)
+                    state_changed(
+                        entity_id,
+                        compressed[COMPRESSED_STATE_STATE],
+                        dict(compressed[COMPRESSED_STATE_ATTRIBUTES]),
+                    )
+
+            removed = event.get(ENTITY_EVENT_REMOVE)
+            if removed:
+                for entity_id in removed:
+                    if self._updated_during_sync is not None:
+                        self._updated_during_sync.add(entity_id)
+                    self._remote_states.pop(entity_id, None)
+                    entity_removed(entity_id)
+
+        # Updates held back by rate control are published when they are due,
+        # aggregates when their window closes
+        self._rate_limiter.async_start(publish_state)
+        self._aggregator.async_start(publish_state)
 
         for event in self._subscribe_events:
-            await self.call(fire_event, "subscribe_events", event_type=event)
+            if event == EVENT_STATE_CHANGED:
+                continue
+            await self.rpc.subscribe(
+                fire_event, {"type": "subscribe_events", "event_type": event}
+            )
 
-        await self.call(got_states, "get_states")
+        if self._ingest_mode == INGEST_MODE_ENTITIES:
+            # Let remote nodes drop everything not needed here before sending
+            await self.rpc.subscribe(
+                filtered_entities_changed,
+                {
+                    "type": TYPE_SUBSCRIBE,
+                    **{
+                        option: self._entry.options.get(option) or []
+                        for option in (
+                            CONF_INCLUDE_DOMAINS,
+                            CONF_INCLUDE_ENTITIES,
+                            CONF_EXCLUDE_DOMAINS,
+                            CONF_EXCLUDE_ENTITIES,
+                            CONF_FILTER,
+                        )
+                    },
+                },
+            )
+        else:
+            await subscribe_state_changed()
 
-        await self.proxy_services.load()
+        # Replies are read by the receive loop this is called from
+        self._hass.async_create_task(self.proxy_services.load())
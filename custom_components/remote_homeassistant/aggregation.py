@@ -0,0 +1,152 @@
+"""Publishing of noisy numeric remote entities as windowed aggregates."""
+from __future__ import annotations
+from asyncio import TimerHandle
+from typing import Any, Callable, Mapping, NamedTuple, Optional, Pattern
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (AGGREGATE_MAX, AGGREGATE_MEAN, AGGREGATE_MIN,
+                    CONF_AGGREGATE, CONF_FILTER, CONF_WINDOW)
+from .filters import FirstMatch, compile_pattern
+
+
+class AggregatePolicy(NamedTuple):
+    """Aggregation settings of a `filter` entry."""
+
+    entity_id: Optional[Pattern[str]]
+    aggregate: str
+    window: float
+
+
+def _compile_policy(conf: Mapping[str, Any]) -> Optional[AggregatePolicy]:
+    """Compile aggregation settings of a filter entry, None if there are none."""
+    aggregate = conf.get(CONF_AGGREGATE)
+    window = conf.get(CONF_WINDOW)
+    if not (aggregate and window):
+        return None
+    return AggregatePolicy(
+        compile_pattern(conf),
+        aggregate,
+        window,
+    )
+
+
+def _decimals(state: str) -> int:
+    """Return number of decimal places of a numeric state."""
+    _, _, fraction = state.partition(".")
+    return len(fraction)
+
+
+class _Window:
+    """Samples of an entity collected during one window."""
+
+    __slots__ = ("handle", "states", "values", "attr")
+
+    def __init__(self, handle: TimerHandle):
+        self.handle = handle
+        self.states: list[str] = []
+        self.values: list[float] = []
+        self.attr: dict = {}
+
+    def add(self, state: str, value: float, attr: dict) -> None:
+        self.states.append(state)
+        self.values.append(value)
+        self.attr = attr
+
+    def result(self, aggregate: str) -> str:
+        """Return aggregated state, formatted like the samples."""
+        values = self.values
+        if aggregate == AGGREGATE_MEAN:
+            # One more decimal place than the samples have
+            decimals = max(map(_decimals, self.states)) + 1
+            return str(round(sum(values) / len(values), decimals))
+        if aggregate == AGGREGATE_MIN:
+            return self.states[values.index(min(values))]
+        if aggregate == AGGREGATE_MAX:
+            return self.states[values.index(max(values))]
+        return self.states[-1]
+
+
+class WindowAggregator:
+    """Publishes numeric states of matching entities once per window.
+
+    Policies come from entries of the `filter` option with `aggregate` and
+    `window`, the first entry whose entity_id pattern matches applies. The
+    first numeric update of an entity opens a window, all updates until the
+    window closes are combined into one state, published with the attributes
+    of the latest update. Non-numeric states like `unavailable` discard the
+    open window and are published right away. The first state of an entity after
+    connecting is always published right away, so it shows up immediately.
+    """
+
+    def __init__(self, hass: HomeAssistant, options: Mapping[str, Any]):
+        """Initialize a new WindowAggregator from config entry options."""
+        self._hass = hass
+        self._policies: FirstMatch[AggregatePolicy] = FirstMatch(
+            map(_compile_policy, options.get(CONF_FILTER, []))
+        )
+        self._seen: set[str] = set()
+        self._windows: dict[str, _Window] = {}
+        self._publish: Optional[Callable[[str, Any, dict], None]] = None
+        self.aggregated = 0
+
+    @callback
+    def async_start(self, publish: Callable[[str, Any, dict], None]) -> None:
+        """Start aggregating, publish is called whenever a window closes."""
+        self._publish = publish
+
+    @callback
+    def async_stop(self) -> None:
+        """Drop open windows, e.g. when disconnected."""
+        for window in self._windows.values():
+            window.handle.cancel()
+        self._windows.clear()
+        self._seen.clear()
+        self._publish = None
+
+    @callback
+    def async_forget(self, entity_id: str) -> None:
+        """Drop open window of a removed entity."""
+        window = self._windows.pop(entity_id, None)
+        if window is not None:
+            window.handle.cancel()
+        self._seen.discard(entity_id)
+
+    @callback
+    def accepts(self, entity_id: str, state: Any, attr: dict) -> bool:
+        """Return if a state update should be published as is right away."""
+        if not self._policies:
+            return True
+
+        policy = self._policies.get(entity_id)
+        if policy is None:
+            return True
+
+        if entity_id not in self._seen:
+            self._seen.add(entity_id)
+            return True
+
+        try:
+            value = float(state)
+        except (TypeError, ValueError):
+            self.async_forget(entity_id)
+            self._seen.add(entity_id)
+            return True
+
+        window = self._windows.get(entity_id)
+        if window is None:
+            window = self._windows[entity_id] = _Window(
+                self._hass.loop.call_later(
+                    policy.window, self._async_close_window, entity_id, policy
+                )
+            )
+        window.add(state, value, attr)
+        self.aggregated += 1
+        return False
+
+    @callback
+    def _async_close_window(self, entity_id: str, policy: AggregatePolicy) -> None:
+        """Publish aggregate of the samples collected during a window."""
+        window = self._windows.pop(entity_id)
+        if self._publish is not None:
+            self._publish(entity_id, window.result(policy.aggregate), window.attr)
@@ -0,0 +1,94 @@
+"""Support for the compressed entity state format of the websocket API.
+
+The `subscribe_entities` command sends all states once and then only the
+fields that changed:
+
+    {"a": {entity_id: compressed_state}}      entities added
+    {"c": {entity_id: {"+": {...}, "-": {...}}}}  entities changed
+    {"r": [entity_id]}                        entities removed
+
+where a compressed state is {"s": state, "a": attributes, "c": context,
+"lc": last_changed, "lu": last_updated}.
+"""
+from __future__ import annotations
+from typing import Any, Optional
+
+from homeassistant.core import State
+
+ENTITY_EVENT_ADD = "a"
+ENTITY_EVENT_CHANGE = "c"
+ENTITY_EVENT_REMOVE = "r"
+
+COMPRESSED_STATE_STATE = "s"
+COMPRESSED_STATE_ATTRIBUTES = "a"
+COMPRESSED_STATE_CONTEXT = "c"
+COMPRESSED_STATE_LAST_CHANGED = "lc"
+COMPRESSED_STATE_LAST_UPDATED = "lu"
+
+DIFF_ADDITIONS = "+"
+DIFF_REMOVALS = "-"
+
+
+def compress_state(state: State) -> dict[str, Any]:
+    """Return compressed representation of a state."""
+    compressed = {
+        COMPRESSED_STATE_STATE: state.state,
+        COMPRESSED_STATE_ATTRIBUTES: dict(state.attributes),
+        COMPRESSED_STATE_CONTEXT: state.context.id,
+        COMPRESSED_STATE_LAST_CHANGED: state.last_changed.timestamp(),
+    }
+    if state.last_updated != state.last_changed:
+        compressed[COMPRESSED_STATE_LAST_UPDATED] = state.last_updated.timestamp()
+    return compressed
+
+
+def compressed_state_diff(old: State, new: State) -> Optional[dict[str, Any]]:
+    """Return diff between two states or None if nothing changed."""
+    additions: dict[str, Any] = {}
+    if new.state != old.state:
+        additions[COMPRESSED_STATE_STATE] = new.state
+    if new.context.id != old.context.id:
+        additions[COMPRESSED_STATE_CONTEXT] = new.context.id
+    if new.last_changed != old.last_changed:
+        additions[COMPRESSED_STATE_LAST_CHANGED] = new.last_changed.timestamp()
+    if new.last_updated != old.last_updated:
+        additions[COMPRESSED_STATE_LAST_UPDATED] = new.last_updated.timestamp()
+
+    diff: dict[str, Any] = {}
+    old_attributes = old.attributes
+    new_attributes = new.attributes
+    if new_attributes is not old_attributes:
+        changed_attributes = {
+            key: value
+            for key, value in new_attributes.items()
+            if key not in old_attributes or old_attributes[key] != value
+        }
+        if changed_attributes:
+            additions[COMPRESSED_STATE_ATTRIBUTES] = changed_attributes
+        removed_attributes = [
+            key for key in old_attributes if key not in new_attributes
+        ]
+        if removed_attributes:
+            diff[DIFF_REMOVALS] = {COMPRESSED_STATE_ATTRIBUTES: removed_attributes}
+
+    if additions:
+        diff[DIFF_ADDITIONS] = additions
+    return diff or None
+
+
+def apply_state_diff(compressed: dict[str, Any], diff: dict[str, Any]) -> None:
+    """Update a compressed state in place with a diff of changed fields."""
+    attributes = compressed.setdefault(COMPRESSED_STATE_ATTRIBUTES, {})
+
+    additions = diff.get(DIFF_ADDITIONS)
+    if additions:
+        for key, value in additions.items():
+            if key == COMPRESSED_STATE_ATTRIBUTES:
+                attributes.update(value)
+            else:
+                compressed[key] = value
+
+    removals = diff.get(DIFF_REMOVALS)
+    if removals:
+        for attribute in removals.get(COMPRESSED_STATE_ATTRIBUTES, ()):
+            attributes.pop(attribute, None)
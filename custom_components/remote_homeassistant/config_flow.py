@@ -16,14 +16,22 @@ from homeassistant.core import callback
 from homeassistant.helpers.instance_id import async_get
 from homeassistant.util import slugify
 
-from . import async_yaml_to_config_entry
-from .const import (CONF_ENTITY_PREFIX,  # pylint:disable=unused-import
-                    CONF_ENTITY_FRIENDLY_NAME_PREFIX,
+from . import WS_COMPRESSION_SCHEMA, async_yaml_to_config_entry
+from .const import (AGGREGATES, CONF_AGGREGATE, CONF_DEADBAND,
+                    CONF_DEADBAND_PERCENT, CONF_ENTITY_FRIENDLY_NAME_PREFIX,
+                    CONF_ENTITY_PREFIX, CONF_EXCLUDE_ATTRIBUTES,
                     CONF_EXCLUDE_DOMAINS, CONF_EXCLUDE_ENTITIES, CONF_FILTER,
-                    CONF_INCLUDE_DOMAINS, CONF_INCLUDE_ENTITIES,
-                    CONF_LOAD_COMPONENTS, CONF_MAIN, CONF_OPTIONS, CONF_REMOTE, CONF_REMOTE_CONNECTION,
-                    CONF_SECURE, CONF_SERVICE_PREFIX, CONF_SERVICES, CONF_MAX_MSG_SIZE,
-                    CONF_SUBSCRIBE_EVENTS, DOMAIN, REMOTE_ID, DEFAULT_MAX_MSG_SIZE)
+                    CONF_INCLUDE_ATTRIBUTES, CONF_INCLUDE_DOMAINS,
+                    CONF_INCLUDE_ENTITIES, CONF_INGEST_MODE,
+                    CONF_LOAD_COMPONENTS, CONF_MAIN, CONF_MAX_MSG_SIZE,
+                    CONF_MIN_INTERVAL, CONF_OPTIONS, CONF_RECONNECT_MODE,
+                    CONF_REMOTE, CONF_REMOTE_CONNECTION, CONF_SECURE,
+                    CONF_SERVICE_PREFIX, CONF_SERVICES,
+                    CONF_SNAPSHOT_TIME_BUDGET, CONF_SUBSCRIBE_EVENTS,
+                    CONF_VOLATILE_ATTRIBUTES, CONF_WINDOW, CONF_WS_COMPRESSION,
+                    CONF_WS_HEARTBEAT, DEFAULT_MAX_MSG_SIZE,
+                    DEFAULT_WS_COMPRESSION, DOMAIN, MAX_WS_COMPRESSION,
+                    RECONNECT_MODE_REMOVE, RECONNECT_MODES, REMOTE_ID)
 from .rest_api import (ApiProblem, CannotConnect, EndpointMissing, InvalidAuth,
                        UnsupportedVersion, async_get_discovery_info)
 from homeassistant.helpers import selector
@@ -39,6 +47,15 @@ _LOGGER = logging.getLogger(__name__)
 ADD_NEW_EVENT = "add_new_event"
 
 FILTER_OPTIONS = [CONF_ENTITY_ID, CONF_UNIT_OF_MEASUREMENT, CONF_ABOVE, CONF_BELOW]
+RATE_CONTROL_OPTIONS = [
+    CONF_MIN_INTERVAL,
+    CONF_DEADBAND,
+    CONF_DEADBAND_PERCENT,
+    CONF_AGGREGATE,
+    CONF_WINDOW,
+    CONF_INCLUDE_ATTRIBUTES,
+    CONF_EXCLUDE_ATTRIBUTES,
+]
 
 
 def _filter_str(index, filter_conf: Mapping[str, str|float]):
@@ -46,7 +63,12 @@ def _filter_str(index, filter_conf: Mapping[str, str|float]):
     unit = filter_conf[CONF_UNIT_OF_MEASUREMENT]
     above = filter_conf[CONF_ABOVE]
     below = filter_conf[CONF_BELOW]
-    return f"{index+1}. {entity_id}, unit: {unit}, above: {above}, below: {below}"
+    rate_control = "".join(
+        f", {conf}: {filter_conf[conf]}"
+        for conf in RATE_CONTROL_OPTIONS
+        if filter_conf.get(conf)
+    )
+    return f"{index+1}. {entity_id}, unit: {unit}, above: {above}, below: {below}{rate_control}"
 
 
 async def validate_input(hass: core.HomeAssistant, conf):
@@ -133,6 +155,15 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Handle the connection details step."""
         errors = {}
         if user_input is not None:
+            # Not part of the form schema, the frontend cannot show vol.Any
+            try:
+                WS_COMPRESSION_SCHEMA(
+                    user_input.get(CONF_WS_COMPRESSION, DEFAULT_WS_COMPRESSION)
+                )
+            except vol.Invalid:
+                errors[CONF_WS_COMPRESSION] = "invalid_compression"
+
+        if user_input is not None and not errors:
             try:
                 info = await validate_input(self.hass, user_input)
             except ApiProblem:
@@ -168,6 +199,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     vol.Required(CONF_MAX_MSG_SIZE, default=max_msg_size): int,
                     vol.Optional(CONF_SECURE, default=secure): bool,
                     vol.Optional(CONF_VERIFY_SSL, default=user_input.get(CONF_VERIFY_SSL, True)): bool,
+                    vol.Optional(
+                        CONF_WS_COMPRESSION,
+                        default=user_input.get(CONF_WS_COMPRESSION, DEFAULT_WS_COMPRESSION),
+                    ): vol.All(int, vol.Range(min=0, max=MAX_WS_COMPRESSION)),
+                    vol.Optional(
+                        CONF_WS_HEARTBEAT,
+                        default=user_input.get(CONF_WS_HEARTBEAT, False),
+                    ): bool,
                 }
             ),
             errors=errors,
@@ -264,7 +303,13 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             raise
         
         if user_input is not None:
-            self.options = user_input.copy()
+            # Options only configurable in YAML are not part of the flow
+            self.options = {
+                key: self.config_entry.options[key]
+                for key in (CONF_SNAPSHOT_TIME_BUDGET, CONF_INGEST_MODE)
+                if key in self.config_entry.options
+            }
+            self.options.update(user_input)
             return await self.async_step_domain_entity_filters()
 
         domains, _ = self._domains_and_entities()
@@ -325,6 +370,12 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                         CONF_SERVICES,
                         default=self._default(CONF_SERVICES),
                     ): selector.selector(service_selector),
+                    vol.Optional(
+                        CONF_RECONNECT_MODE,
+                        default=self.config_entry.options.get(
+                            CONF_RECONNECT_MODE, RECONNECT_MODE_REMOVE
+                        ),
+                    ): vol.In(RECONNECT_MODES),
                 }
             ),
             description_placeholders={
@@ -398,6 +449,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
     async def async_step_general_filters(self, user_input=None):
         """Manage domain and entity filters."""
+        errors = {}
         if user_input is not None:
             # Continue to next step if entity id is not specified
             if CONF_ENTITY_ID not in user_input:
@@ -409,16 +461,28 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 ]
                 if self.options is not None:
                     self.options[CONF_FILTER] = [self.filters[i] for i in selected_indices]  # type: ignore
+                    self.options[CONF_VOLATILE_ATTRIBUTES] = user_input.get(
+                        CONF_VOLATILE_ATTRIBUTES, []
+                    )
                 return await self.async_step_events()
 
+            volatile = user_input.get(CONF_VOLATILE_ATTRIBUTES, [])
             selected = user_input.get(CONF_FILTER, [])
-            new_filter = {conf: user_input.get(conf) for conf in FILTER_OPTIONS}
-            
-            selected.append(_filter_str(len(self.filters), new_filter))  # type: ignore
-            self.filters.append(new_filter)  # type: ignore
+            # Like vol.Inclusive in YAML, aggregates need a window
+            if (CONF_AGGREGATE in user_input) != (CONF_WINDOW in user_input):
+                errors["base"] = "aggregate_without_window"
+            else:
+                new_filter = {
+                    conf: user_input.get(conf)
+                    for conf in FILTER_OPTIONS + RATE_CONTROL_OPTIONS
+                }
+
+                selected.append(_filter_str(len(self.filters), new_filter))  # type: ignore
+                self.filters.append(new_filter)  # type: ignore
         else:
             self.filters = self.config_entry.options.get(CONF_FILTER, [])
             selected = [_filter_str(i, filterItem) for i, filterItem in enumerate(self.filters)] # type: ignore
+            volatile = self.config_entry.options.get(CONF_VOLATILE_ATTRIBUTES) or []
 
         if self.filters is None:
             self.filters = []
@@ -434,8 +498,42 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     vol.Optional(CONF_UNIT_OF_MEASUREMENT): str,
                     vol.Optional(CONF_ABOVE): vol.Coerce(float),
                     vol.Optional(CONF_BELOW): vol.Coerce(float),
+                    vol.Optional(CONF_MIN_INTERVAL): vol.All(
+                        vol.Coerce(float), vol.Range(min=0)
+                    ),
+                    vol.Optional(CONF_DEADBAND): vol.All(
+                        vol.Coerce(float), vol.Range(min=0)
+                    ),
+                    vol.Optional(CONF_DEADBAND_PERCENT): vol.All(
+                        vol.Coerce(float), vol.Range(min=0, max=100)
+                    ),
+                    vol.Optional(CONF_AGGREGATE): vol.In(AGGREGATES),
+                    vol.Optional(CONF_WINDOW): vol.All(
+                        vol.Coerce(float), vol.Range(min=0, min_included=False)
+                    ),
+                    vol.Optional(CONF_INCLUDE_ATTRIBUTES): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[], multiple=True, custom_value=True
+                        )
+                    ),
+                    vol.Optional(CONF_EXCLUDE_ATTRIBUTES): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[], multiple=True, custom_value=True
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_VOLATILE_ATTRIBUTES, default=volatile,
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=volatile,
+                            multiple=True,
+                            mode=selector.SelectSelectorMode.DROPDOWN,
+                            custom_value=True,
+                        )
+                    ),
                 }
             ),
+            errors=errors,
         )
 
     async def async_step_events(self, user_input=None):
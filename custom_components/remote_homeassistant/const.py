@@ -15,6 +15,19 @@ CONF_SUBSCRIBE_EVENTS = "subscribe_events"
 CONF_ENTITY_PREFIX = "entity_prefix"
 CONF_ENTITY_FRIENDLY_NAME_PREFIX = "entity_friendly_name_prefix"
 CONF_MAX_MSG_SIZE = "max_message_size"
+CONF_WS_COMPRESSION = "websocket_compression"
+CONF_WS_HEARTBEAT = "websocket_heartbeat"
+CONF_SNAPSHOT_TIME_BUDGET = "snapshot_time_budget"
+CONF_INGEST_MODE = "ingest_mode"
+CONF_RECONNECT_MODE = "reconnect_mode"
+CONF_VOLATILE_ATTRIBUTES = "volatile_attributes"
+CONF_MIN_INTERVAL = "min_interval"
+CONF_DEADBAND = "deadband"
+CONF_DEADBAND_PERCENT = "deadband_percent"
+CONF_AGGREGATE = "aggregate"
+CONF_WINDOW = "window"
+CONF_INCLUDE_ATTRIBUTES = "include_attributes"
+CONF_EXCLUDE_ATTRIBUTES = "exclude_attributes"
 
 CONF_INCLUDE_DOMAINS = "include_domains"
 CONF_INCLUDE_ENTITIES = "include_entities"
@@ -27,9 +40,74 @@ CONF_REMOTE = "Setup as remote node"
 
 DOMAIN = "remote_homeassistant"
 
+# Receive compressed states and diffs via subscribe_entities
+INGEST_MODE_ENTITIES = "subscribe_entities"
+# Receive full states via get_states and state_changed events
+INGEST_MODE_EVENTS = "state_changed"
+
+# Remove mirrored entities while disconnected
+RECONNECT_MODE_REMOVE = "remove"
+# Keep mirrored entities, but with state unavailable
+RECONNECT_MODE_UNAVAILABLE = "unavailable"
+# Keep mirrored entities with their last known state
+RECONNECT_MODE_STALE = "stale"
+RECONNECT_MODES = [RECONNECT_MODE_REMOVE, RECONNECT_MODE_UNAVAILABLE, RECONNECT_MODE_STALE]
+
 REMOTE_ID = "remote"
 
+# Functions to combine the states of a window with
+AGGREGATE_MEAN = "mean"
+AGGREGATE_MIN = "min"
+AGGREGATE_MAX = "max"
+AGGREGATE_LAST = "last"
+AGGREGATES = [AGGREGATE_MEAN, AGGREGATE_MIN, AGGREGATE_MAX, AGGREGATE_LAST]
+
+# Key of the ServiceCallRouter shared by all connections in hass.data[DOMAIN]
+DATA_SERVICE_ROUTER = "service_router"
+# Key of the ConnectionSupervisor shared by all connections in hass.data[DOMAIN]
+DATA_SUPERVISOR = "supervisor"
+
+# Connections doing discovery, websocket connect and authentication at once
+MAX_CONCURRENT_HANDSHAKES = 4
+# Seconds a connection attempt (discovery, websocket connect and
+# authentication) may take before its handshake slot is given up
+HANDSHAKE_TIMEOUT = 30
+# Range of seconds to wait before retrying a failed connection attempt
+RETRY_BACKOFF_MIN = 2
+RETRY_BACKOFF_MAX = 300
+
 # replaces 'from homeassistant.core import SERVICE_CALL_LIMIT'
 SERVICE_CALL_LIMIT = 10
 
+# Seconds to wait for the reply to a request sent to a remote instance
+REQUEST_TIMEOUT = 30
+# Requests sent to a remote instance without having received a reply yet
+MAX_IN_FLIGHT_REQUESTS = 32
+
 DEFAULT_MAX_MSG_SIZE = 16*1024*1024
+
+# permessage-deflate window bits, 0 disables compression
+DEFAULT_WS_COMPRESSION = 0
+MIN_WS_COMPRESSION = 9
+MAX_WS_COMPRESSION = 15
+
+# Seconds discovery info of a remote instance is reused for reconnects
+DISCOVERY_CACHE_TTL = 3600
+# Seconds to skip the discovery endpoint of this integration after a 404
+DISCOVERY_MISSING_TTL = 6 * 3600
+
+# Seconds mirrored states may change before the stored snapshot is updated
+SNAPSHOT_SAVE_DELAY = 60
+STORAGE_VERSION = 1
+
+# Seconds between updates of the diagnostic sensors of a connection
+DIAGNOSTICS_INTERVAL = 30
+
+# Service profiling the handling of messages of a connection
+SERVICE_PROFILE = "profile"
+ATTR_ENTRY_ID = "entry_id"
+ATTR_SECONDS = "seconds"
+DEFAULT_PROFILE_SECONDS = 60
+
+# Milliseconds of event loop time used per chunk of the initial state snapshot
+DEFAULT_SNAPSHOT_TIME_BUDGET = 50
@@ -0,0 +1,194 @@
+"""Include/exclude and state filters applied to remote entities."""
+from __future__ import annotations
+import fnmatch
+import logging
+import re
+from typing import (Any, Generic, Iterable, Mapping, NamedTuple, Optional,
+                    Pattern, TypeVar)
+
+from homeassistant.const import (CONF_ABOVE, CONF_BELOW, CONF_ENTITY_ID,
+                                 CONF_UNIT_OF_MEASUREMENT)
+
+from .const import (CONF_EXCLUDE_DOMAINS, CONF_EXCLUDE_ENTITIES, CONF_FILTER,
+                    CONF_INCLUDE_DOMAINS, CONF_INCLUDE_ENTITIES)
+
+_LOGGER = logging.getLogger(__name__)
+
+_UNPARSED = object()
+
+_RuleT = TypeVar("_RuleT")
+
+
+def compile_pattern(conf: Mapping[str, Any]) -> Optional[Pattern[str]]:
+    """Compile entity_id pattern of a filter entry, None matches all entities."""
+    pattern = conf.get(CONF_ENTITY_ID)
+    return re.compile(fnmatch.translate(pattern)) if pattern else None
+
+
+class FirstMatch(Generic[_RuleT]):
+    """Finds the first rule whose entity_id pattern matches an entity.
+
+    Rules are compiled entries of the `filter` option with an entity_id
+    attribute as returned by compile_pattern. The match is cached per entity.
+    """
+
+    def __init__(self, rules: Iterable[Optional[_RuleT]]):
+        """Initialize from compiled rules, None entries are left out."""
+        self._rules = [rule for rule in rules if rule is not None]
+        self._entity_rules: dict[str, Optional[_RuleT]] = {}
+
+    def __bool__(self) -> bool:
+        """Return if there are any rules."""
+        return bool(self._rules)
+
+    def get(self, entity_id: str) -> Optional[_RuleT]:
+        """Return the rule applying to an entity, None if none does."""
+        try:
+            return self._entity_rules[entity_id]
+        except KeyError:
+            pass
+
+        rule = next(
+            (
+                rule
+                for rule in self._rules
+                if rule.entity_id is None or rule.entity_id.match(entity_id)
+            ),
+            None,
+        )
+        self._entity_rules[entity_id] = rule
+        return rule
+
+    def forget(self, entity_id: str) -> None:
+        """Drop cached match of an entity."""
+        self._entity_rules.pop(entity_id, None)
+
+
+class FilterRule(NamedTuple):
+    """A compiled entry of the `filter` option."""
+
+    entity_id: Optional[Pattern[str]]
+    unit_of_measurement: Optional[str]
+    above: Optional[float]
+    below: Optional[float]
+
+
+def _compile_rule(conf: Mapping[str, Any]) -> FilterRule:
+    """Compile a filter entry from the options into a rule."""
+    return FilterRule(
+        compile_pattern(conf),
+        conf.get(CONF_UNIT_OF_MEASUREMENT),
+        conf.get(CONF_ABOVE),
+        conf.get(CONF_BELOW),
+    )
+
+
+class EntityFilter:
+    """Decides which remote states are published on the local instance.
+
+    The include/exclude lists and filter rules are compiled once. For every
+    entity the verdict of the include/exclude lists and the filter rules that
+    match its entity_id are cached, so a state update only has to evaluate the
+    thresholds of rules that can actually apply to it. The entry is reloaded
+    when its options change, which creates a new filter and drops the cache.
+    """
+
+    def __init__(self, options: Mapping[str, Any]):
+        """Initialize a new EntityFilter from config entry options."""
+        # see homeassistant/components/influxdb/__init__.py
+        # for include/exclude logic
+        self._whitelist_e = frozenset(options.get(CONF_INCLUDE_ENTITIES, []))
+        self._whitelist_d = frozenset(options.get(CONF_INCLUDE_DOMAINS, []))
+        self._blacklist_e = frozenset(options.get(CONF_EXCLUDE_ENTITIES, []))
+        self._blacklist_d = frozenset(options.get(CONF_EXCLUDE_DOMAINS, []))
+
+        # Rules without a threshold can never reject a state
+        self._rules = [
+            rule
+            for rule in map(_compile_rule, options.get(CONF_FILTER, []))
+            if rule.above or rule.below
+        ]
+        self._entity_rules: dict[str, Optional[tuple[FilterRule, ...]]] = {}
+
+    def _included(self, entity_id: str) -> bool:
+        """Return if entity passes the include/exclude lists."""
+        domain = entity_id.split(".", 1)[0]
+
+        if entity_id in self._blacklist_e or domain in self._blacklist_d:
+            return False
+
+        if (
+            (self._whitelist_e or self._whitelist_d)
+            and entity_id not in self._whitelist_e
+            and domain not in self._whitelist_d
+        ):
+            return False
+
+        return True
+
+    def rules_for(self, entity_id: str) -> Optional[tuple[FilterRule, ...]]:
+        """Return filter rules for an entity or None if it is excluded."""
+        try:
+            return self._entity_rules[entity_id]
+        except KeyError:
+            pass
+
+        rules: Optional[tuple[FilterRule, ...]] = None
+        if self._included(entity_id):
+            rules = tuple(
+                rule
+                for rule in self._rules
+                if rule.entity_id is None or rule.entity_id.match(entity_id)
+            )
+        self._entity_rules[entity_id] = rules
+        return rules
+
+    def is_included(self, entity_id: str) -> bool:
+        """Return if an entity passes the include/exclude lists."""
+        return self.rules_for(entity_id) is not None
+
+    def accepts(self, entity_id: str, state: Any, attr: Mapping[str, Any]) -> bool:
+        """Return if a state update of an entity should be published."""
+        rules = self.rules_for(entity_id)
+        if rules is None:
+            return False
+
+        value: Any = _UNPARSED
+        for rule in rules:
+            if (
+                rule.unit_of_measurement
+                and attr.get(CONF_UNIT_OF_MEASUREMENT) != rule.unit_of_measurement
+            ):
+                continue
+
+            # Parse numeric state once, no matter how many rules apply
+            if value is _UNPARSED:
+                try:
+                    value = float(state)
+                except (TypeError, ValueError):
+                    value = None
+            if value is None:
+                continue
+
+            if rule.below and value < rule.below:
+                _LOGGER.info(
+                    "%s: ignoring state '%s', because below '%s'",
+                    entity_id,
+                    state,
+                    rule.below,
+                )
+                return False
+            if rule.above and value > rule.above:
+                _LOGGER.info(
+                    "%s: ignoring state '%s', because above '%s'",
+                    entity_id,
+                    state,
+                    rule.above,
+                )
+                return False
+
+        return True
+
+    def forget(self, entity_id: str) -> None:
+        """Drop cached decision for an entity."""
+        self._entity_rules.pop(entity_id, None)
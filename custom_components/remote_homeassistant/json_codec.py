@@ -0,0 +1,32 @@
+"""JSON encoding and decoding of websocket messages.
+
+Uses the orjson based helpers of Home Assistant when available, orjson
+directly on versions without them and the json module as last resort.
+"""
+from __future__ import annotations
+from typing import Any, Callable
+
+json_loads: Callable[[Any], Any]
+json_dumps: Callable[[Any], str]
+
+try:
+    from homeassistant.helpers.json import json_dumps
+    from homeassistant.util.json import json_loads
+
+    CODEC = "homeassistant"
+except ImportError:
+    try:
+        import orjson
+
+        def json_dumps(data: Any) -> str:
+            """Dump data as json string."""
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+        json_loads = orjson.loads
+        CODEC = "orjson"
+    except ImportError:
+        import json
+
+        json_dumps = json.dumps
+        json_loads = json.loads
+        CODEC = "json"
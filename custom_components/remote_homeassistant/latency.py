@@ -0,0 +1,123 @@
+"""Statistics of latencies measured on remote connections."""
+from __future__ import annotations
+import time
+from collections import deque
+from typing import Any, Optional
+
+# Recent samples kept, older ones are dropped
+DEFAULT_SAMPLES = 256
+# Samples kept per domain, there may be many domains
+DOMAIN_SAMPLES = 64
+# Readings of the remote clock kept, the one with the smallest round trip
+# time is the most accurate
+CLOCK_READINGS = 8
+
+
+class LatencyStats:
+    """Keeps recent latency samples and reports statistics about them.
+
+    Samples are seconds, reported values are milliseconds rounded to one
+    decimal place. Percentiles use the nearest rank of the kept samples.
+    """
+
+    def __init__(self, samples: int = DEFAULT_SAMPLES):
+        """Initialize a new LatencyStats instance."""
+        self._samples: deque[float] = deque(maxlen=samples)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        """Add a sample."""
+        self._samples.append(seconds)
+
+    def clear(self) -> None:
+        """Drop all samples, e.g. when reconnected."""
+        self._samples.clear()
+
+    @property
+    def min(self) -> Optional[float]:
+        """Return smallest sample in milliseconds."""
+        if not self._samples:
+            return None
+        return round(min(self._samples) * 1000, 1)
+
+    @property
+    def avg(self) -> Optional[float]:
+        """Return mean of samples in milliseconds."""
+        if not self._samples:
+            return None
+        return round(sum(self._samples) / len(self._samples) * 1000, 1)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Return percentile of samples in milliseconds."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(0, -(-len(ordered) * percent // 100) - 1)
+        return round(ordered[int(rank)] * 1000, 1)
+
+
+class ReplicationLag:
+    """Tracks how long remote state updates take until they arrive here.
+
+    Lag is the time between an update in the remote instance, as stamped by
+    its clock, and its arrival. The clocks of both instances may differ, so
+    their offset is measured by reading the remote clock NTP-style: the remote
+    time is taken to be read halfway through the round trip of the request.
+    Of recent readings the one with the smallest round trip time is used.
+    Without readings the clocks are assumed to be in sync.
+    """
+
+    def __init__(self):
+        """Initialize a new ReplicationLag instance."""
+        self.total = LatencyStats()
+        self.domains: dict[str, LatencyStats] = {}
+        # Local minus remote clock in seconds
+        self.offset = 0.0
+        self._clock_readings: deque[tuple[float, float]] = deque(
+            maxlen=CLOCK_READINGS
+        )
+
+    def add(self, entity_id: str, remote_timestamp: float) -> None:
+        """Add lag of an update stamped with remote_timestamp (epoch seconds)."""
+        lag = max(time.time() - remote_timestamp - self.offset, 0.0)
+        self.total.add(lag)
+        domain = entity_id.partition(".")[0]
+        stats = self.domains.get(domain)
+        if stats is None:
+            stats = self.domains[domain] = LatencyStats(DOMAIN_SAMPLES)
+        stats.add(lag)
+
+    def add_clock_reading(
+        self, sent: float, remote_time: float, received: float
+    ) -> None:
+        """Add remote_time read by a request between sent and received.
+
+        All are epoch seconds, sent and received of the local clock.
+        """
+        round_trip = received - sent
+        self._clock_readings.append((round_trip, (sent + received) / 2 - remote_time))
+        self.offset = min(self._clock_readings)[1]
+
+    def clear_clock(self) -> None:
+        """Forget clock readings, e.g. when reconnected."""
+        self._clock_readings.clear()
+        self.offset = 0.0
+
+    def summary(self) -> dict[str, Any]:
+        """Return lag percentiles overall and by domain in milliseconds."""
+        return {
+            "lag_p50": self.total.percentile(50),
+            "lag_p95": self.total.percentile(95),
+            "lag_p99": self.total.percentile(99),
+            "clock_offset": round(self.offset * 1000, 1),
+            "lag_by_domain": {
+                domain: {
+                    "p50": stats.percentile(50),
+                    "p95": stats.percentile(95),
+                    "p99": stats.percentile(99),
+                }
+                for domain, stats in sorted(self.domains.items())
+            },
+        }
@@ -0,0 +1,141 @@
+"""Metrics of remote connections in Prometheus text format."""
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Any, Iterable, Sequence
+
+# Upper bounds of histogram buckets
+LATENCY_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5,
+)
+FRAME_SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152)
+HANDSHAKE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Counts observed values in buckets, like a Prometheus histogram.
+
+    Observing only increments a counter, so it is cheap enough to be done
+    for every message.
+    """
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float]):
+        """Initialize a new Histogram with bucket upper bounds."""
+        self.bounds = bounds
+        # Last one counts values above all bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Count a value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class ConnectionMetrics:
+    """Histograms and counters of one remote connection."""
+
+    def __init__(self):
+        """Initialize a new ConnectionMetrics instance."""
+        self.decode_seconds = Histogram(LATENCY_BUCKETS)
+        self.filter_seconds = Histogram(LATENCY_BUCKETS)
+        self.apply_seconds = Histogram(LATENCY_BUCKETS)
+        self.frame_bytes = Histogram(FRAME_SIZE_BUCKETS)
+        self.handshake_seconds = Histogram(HANDSHAKE_BUCKETS)
+        self.reconnects = 0
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict[str, str], **extra: str) -> str:
+    return ",".join(
+        f'{key}="{_escape(str(value))}"' for key, value in {**labels, **extra}.items()
+    )
+
+
+def _histogram_lines(name: str, labels: dict[str, str], histogram: Histogram):
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        yield f"{name}_bucket{{{_labels(labels, le=repr(float(bound)))}}} {cumulative}"
+    cumulative += histogram.counts[-1]
+    yield f'{name}_bucket{{{_labels(labels, le="+Inf")}}} {cumulative}'
+    yield f"{name}_sum{{{_labels(labels)}}} {histogram.sum!r}"
+    yield f"{name}_count{{{_labels(labels)}}} {cumulative}"
+
+
+# Name, help and how to get the histogram from a connection
+HISTOGRAMS = [
+    (
+        "decode_seconds",
+        "Time spent decoding received websocket frames",
+        lambda connection: connection.metrics.decode_seconds,
+    ),
+    (
+        "filter_seconds",
+        "Time spent deciding whether a state update is published",
+        lambda connection: connection.metrics.filter_seconds,
+    ),
+    (
+        "apply_seconds",
+        "Time spent writing a state update to the state machine",
+        lambda connection: connection.metrics.apply_seconds,
+    ),
+    (
+        "frame_size_bytes",
+        "Size of received websocket frames",
+        lambda connection: connection.metrics.frame_bytes,
+    ),
+    (
+        "handshake_seconds",
+        "Time from starting a connection attempt until authenticated",
+        lambda connection: connection.metrics.handshake_seconds,
+    ),
+]
+# Name, help and key in diagnostic counters of a connection
+COUNTERS = [
+    ("reconnects", "Connections lost and reconnected", "reconnects"),
+    ("messages_received", "Websocket messages received", "messages_received"),
+    ("received_bytes", "Websocket payload bytes received", "bytes_received"),
+    ("updates_received", "State updates received", "updates_received"),
+    ("updates_published", "State updates written locally", "updates_published"),
+    ("filtered_updates", "State updates dropped by filter", "filtered_updates"),
+    ("aggregated_updates", "State updates combined into aggregates", "aggregated_updates"),
+    ("suppressed_updates", "State updates dropped by rate control", "suppressed_updates"),
+    ("unchanged_updates", "State updates not changing anything", "unchanged_updates"),
+]
+GAUGES = [
+    ("pending_requests", "Requests waiting for their reply", "pending_requests"),
+    ("connected", "Whether the connection is authenticated", "connected"),
+]
+
+
+def render(connections: Iterable[tuple[dict[str, str], Any]]) -> str:
+    """Render metrics of connections, given with the labels to use for each."""
+    connections = [
+        (labels, connection, connection.diagnostic_counters)
+        for labels, connection in connections
+    ]
+    lines = []
+    for name, description, get in HISTOGRAMS:
+        name = f"remote_homeassistant_{name}"
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, connection, _ in connections:
+            lines.extend(_histogram_lines(name, labels, get(connection)))
+    for kind, families in (("counter", COUNTERS), ("gauge", GAUGES)):
+        for name, description, key in families:
+            name = f"remote_homeassistant_{name}"
+            if kind == "counter":
+                name = f"{name}_total"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, _, counters in connections:
+                lines.append(f"{name}{{{_labels(labels)}}} {counters[key]}")
+    lines.append("")
+    return "\n".join(lines)
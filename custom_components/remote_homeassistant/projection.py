@@ -0,0 +1,88 @@
+"""Dropping of unneeded attributes of remote entities."""
+from __future__ import annotations
+from typing import Any, Mapping, NamedTuple, Optional, Pattern
+
+from .const import CONF_EXCLUDE_ATTRIBUTES, CONF_FILTER, CONF_INCLUDE_ATTRIBUTES
+from .filters import FirstMatch, compile_pattern
+from .json_codec import json_dumps
+
+
+class ProjectionRule(NamedTuple):
+    """Attribute lists of a `filter` entry."""
+
+    entity_id: Optional[Pattern[str]]
+    include: Optional[frozenset[str]]
+    exclude: frozenset[str]
+
+
+def _compile_rule(conf: Mapping[str, Any]) -> Optional[ProjectionRule]:
+    """Compile attribute lists of a filter entry, None if there are none."""
+    include = conf.get(CONF_INCLUDE_ATTRIBUTES)
+    exclude = conf.get(CONF_EXCLUDE_ATTRIBUTES)
+    if not (include or exclude):
+        return None
+    return ProjectionRule(
+        compile_pattern(conf),
+        frozenset(include) if include else None,
+        frozenset(exclude or ()),
+    )
+
+
+class AttributeProjection:
+    """Removes attributes of remote states before they are published.
+
+    Rules come from entries of the `filter` option, the first entry whose
+    entity_id pattern matches applies. With an include list only the listed
+    attributes are kept, attributes in the exclude list are always removed.
+    The JSON size of removed attributes is summed up in bytes_saved. Sizes are
+    cached per entity and attribute, so a removed value is only serialized
+    again once it changed.
+    """
+
+    def __init__(self, options: Mapping[str, Any]):
+        """Initialize a new AttributeProjection from config entry options."""
+        self._rules: FirstMatch[ProjectionRule] = FirstMatch(
+            map(_compile_rule, options.get(CONF_FILTER, []))
+        )
+        # Last removed value and its JSON size per entity and attribute
+        self._dropped_sizes: dict[str, dict[str, tuple[Any, int]]] = {}
+        self.bytes_saved = 0
+
+    def project(self, entity_id: str, attr: dict) -> dict:
+        """Return attributes of a state with unneeded ones removed."""
+        if not self._rules:
+            return attr
+
+        rule = self._rules.get(entity_id)
+        if rule is None:
+            return attr
+
+        kept = {}
+        sizes = None
+        for key, value in attr.items():
+            if key in rule.exclude or (
+                rule.include is not None and key not in rule.include
+            ):
+                if sizes is None:
+                    sizes = self._dropped_sizes.setdefault(entity_id, {})
+                self.bytes_saved += self._dropped_size(sizes, key, value)
+            else:
+                kept[key] = value
+        return kept
+
+    @staticmethod
+    def _dropped_size(
+        sizes: dict[str, tuple[Any, int]], key: str, value: Any
+    ) -> int:
+        """Return JSON size of a removed attribute, cached while unchanged."""
+        cached = sizes.get(key)
+        if cached is not None and (cached[0] is value or cached[0] == value):
+            return cached[1]
+        size = len(json_dumps({key: value}))
+        sizes[key] = (value, size)
+        return size
+
+    def forget(self, entity_id: str) -> None:
+        """Drop cached rule and sizes of an entity."""
+        self._rules.forget(entity_id)
+        self._dropped_sizes.pop(entity_id, None)
@@ -1,13 +1,15 @@
 """Support for proxy services."""
 from __future__ import annotations
-import asyncio
-from typing import Any
+import logging
 
 import voluptuous as vol
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.service import SERVICE_DESCRIPTION_CACHE
 
 from .const import CONF_SERVICE_PREFIX, CONF_SERVICES, SERVICE_CALL_LIMIT
+from .rpc import ConnectionClosed
+
+_LOGGER = logging.getLogger(__name__)
 
 
 class ProxyServices:
@@ -32,7 +34,14 @@ class ProxyServices:
 
     async def load(self):
         """Call to make initial registration of services."""
-        await self.remote.call(self._async_got_services, "get_services")
+        try:
+            message = await self.remote.rpc.request({"type": "get_services"})
+        except ConnectionClosed:
+            return
+        if not message["success"]:
+            _LOGGER.error("Could not fetch remote services: %s", message["error"]["message"])
+            return
+        await self._async_got_services(message)
 
     async def unload(self):
         """Call to unregister all registered services."""
@@ -83,27 +92,18 @@ class ProxyServices:
     async def _async_handle_service_call(self, event) -> None:
         """Handle service call to proxy service."""
         # An exception must be raised from the service call handler (thus method) in
-        # order to end up in the frontend. The code below synchronizes reception of
-        # the service call result, so potential error message can be used as exception
-        # message. Not very pretty...
-        ev = asyncio.Event()
-        res : dict[str,Any] | None = None
-
-        def _resp(message):
-            nonlocal res
-            res = message
-            ev.set()
-
+        # order to end up in the frontend, so the result of the service call is
+        # awaited and a potential error message used as exception message.
         service_prefix = self.entry.options.get(CONF_SERVICE_PREFIX)
         service = event.service[len(service_prefix) :]
-        await self.remote.call(
-            _resp,
-            "call_service",
-            domain=event.domain,
-            service=service,
-            service_data=event.data.copy(),
+        res = await self.remote.rpc.request(
+            {
+                "type": "call_service",
+                "domain": event.domain,
+                "service": service,
+                "service_data": event.data.copy(),
+            },
+            SERVICE_CALL_LIMIT,
         )
-
-        await asyncio.wait_for(ev.wait(), SERVICE_CALL_LIMIT)
-        if isinstance(res, dict) and not res["success"]:
+        if not res["success"]:
             raise HomeAssistantError(res["error"]["message"])
@@ -0,0 +1,147 @@
+"""Throttling and deadband of frequently updated remote entities."""
+from __future__ import annotations
+import time
+from asyncio import TimerHandle
+from typing import Any, Callable, Mapping, NamedTuple, Optional, Pattern
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (CONF_DEADBAND, CONF_DEADBAND_PERCENT, CONF_FILTER,
+                    CONF_MIN_INTERVAL)
+from .filters import FirstMatch, compile_pattern
+
+
+class RatePolicy(NamedTuple):
+    """Rate control settings of a `filter` entry."""
+
+    entity_id: Optional[Pattern[str]]
+    min_interval: float
+    deadband: Optional[float]
+    deadband_percent: Optional[float]
+
+
+def _compile_policy(conf: Mapping[str, Any]) -> Optional[RatePolicy]:
+    """Compile rate control settings of a filter entry, None if there are none."""
+    min_interval = conf.get(CONF_MIN_INTERVAL) or 0
+    deadband = conf.get(CONF_DEADBAND) or None
+    deadband_percent = conf.get(CONF_DEADBAND_PERCENT) or None
+    if not (min_interval or deadband or deadband_percent):
+        return None
+    return RatePolicy(
+        compile_pattern(conf),
+        min_interval,
+        deadband,
+        deadband_percent,
+    )
+
+
+def _parse(state: Any) -> Optional[float]:
+    try:
+        return float(state)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Suppresses remote state updates arriving too often or changing too little.
+
+    Policies come from entries of the `filter` option, the first entry whose
+    entity_id pattern matches applies. An update is dropped if its numeric
+    state is within the deadband of the last published one. An update
+    arriving sooner than min_interval after the last published one is held
+    back and published when the interval has passed, unless a newer update
+    replaced it by then, so the latest state always ends up being published.
+    """
+
+    def __init__(self, hass: HomeAssistant, options: Mapping[str, Any]):
+        """Initialize a new RateLimiter from config entry options."""
+        self._hass = hass
+        self._policies: FirstMatch[RatePolicy] = FirstMatch(
+            map(_compile_policy, options.get(CONF_FILTER, []))
+        )
+        # Time and numeric state of last published update
+        self._published: dict[str, tuple[float, Optional[float]]] = {}
+        self._trailing: dict[str, tuple[TimerHandle, Any, dict]] = {}
+        self._publish: Optional[Callable[[str, Any, dict], None]] = None
+        self.suppressed = 0
+
+    @callback
+    def async_start(self, publish: Callable[[str, Any, dict], None]) -> None:
+        """Start handling updates, publish is called for held back ones."""
+        self._publish = publish
+
+    @callback
+    def async_stop(self) -> None:
+        """Drop held back updates and history, e.g. when disconnected."""
+        for handle, _, _ in self._trailing.values():
+            handle.cancel()
+        self._trailing.clear()
+        self._published.clear()
+        self._publish = None
+
+    @callback
+    def async_forget(self, entity_id: str) -> None:
+        """Drop held back update and history of a removed entity."""
+        self._cancel_trailing(entity_id)
+        self._published.pop(entity_id, None)
+
+    def _cancel_trailing(self, entity_id: str) -> None:
+        trailing = self._trailing.pop(entity_id, None)
+        if trailing is not None:
+            trailing[0].cancel()
+            self.suppressed += 1
+
+    @callback
+    def accepts(self, entity_id: str, state: Any, attr: dict) -> bool:
+        """Return if a state update should be published right away."""
+        if not self._policies:
+            return True
+
+        policy = self._policies.get(entity_id)
+        if policy is None:
+            return True
+
+        value = _parse(state) if policy.deadband or policy.deadband_percent else None
+        published = self._published.get(entity_id)
+        now = time.monotonic()
+        if published is None:
+            self._published[entity_id] = (now, value)
+            return True
+
+        published_at, published_value = published
+        if value is not None and published_value is not None:
+            delta = abs(value - published_value)
+            if (policy.deadband and delta < policy.deadband) or (
+                policy.deadband_percent
+                and delta < abs(published_value) * policy.deadband_percent / 100
+            ):
+                # Close enough to what is published, a held back update is
+                # outdated by this one
+                self._cancel_trailing(entity_id)
+                self.suppressed += 1
+                return False
+
+        wait = published_at + policy.min_interval - now
+        if wait > 0:
+            trailing = self._trailing.get(entity_id)
+            if trailing is None:
+                handle = self._hass.loop.call_later(
+                    wait, self._async_publish_trailing, entity_id
+                )
+            else:
+                handle = trailing[0]
+                self.suppressed += 1
+            self._trailing[entity_id] = (handle, state, attr)
+            return False
+
+        self._cancel_trailing(entity_id)
+        self._published[entity_id] = (now, value)
+        return True
+
+    @callback
+    def _async_publish_trailing(self, entity_id: str) -> None:
+        """Publish update held back until min_interval passed."""
+        _, state, attr = self._trailing.pop(entity_id)
+        self._published[entity_id] = (time.monotonic(), _parse(state))
+        if self._publish is not None:
+            self._publish(entity_id, state, attr)
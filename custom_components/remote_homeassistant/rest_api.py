@@ -1,16 +1,25 @@
 """Simple implementation to call Home Assistant REST API."""
 
+import asyncio
 import logging
+import time
+
+from aiohttp import hdrs
 from homeassistant import exceptions
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.instance_id import async_get as async_get_instance_id
 
+from .const import DISCOVERY_CACHE_TTL, DISCOVERY_MISSING_TTL, DOMAIN
+
 _LOGGER = logging.getLogger(__name__)
 
 API_URL = "{proto}://{host}:{port}/api/remote_homeassistant/discovery"
 FALLBACK_API_URL = "{proto}://{host}:{port}/api/"
 CONFIG_API_URL = "{proto}://{host}:{port}/api/config"
 
+# ETag and payload of discovery responses by url, for conditional requests
+DATA_DISCOVERY_VALIDATORS = f"{DOMAIN}_discovery_validators"
+
 
 class ApiProblem(exceptions.HomeAssistantError):
     """Error to indicate problem reaching API."""
@@ -38,59 +47,101 @@ class EndpointMissing(exceptions.HomeAssistantError):
 
 async def async_get_discovery_info(hass, host, port, secure, access_token, verify_ssl):
     """Get discovery information from server."""
+    session = async_get_clientsession(hass, verify_ssl)
     proto = "https" if secure else "http"
-    headers = {
+    headers = _headers(access_token)
+
+    info, _ = await _async_get_custom_discovery_info(
+        hass, session, proto, host, port, headers
+    )
+    if info is not None:
+        return info
+    return await _async_get_fallback_discovery_info(session, proto, host, port, headers)
+
+
+def _headers(access_token):
+    return {
         "Authorization": "Bearer " + access_token,
         "Content-Type": "application/json",
     }
-    session = async_get_clientsession(hass, verify_ssl)
 
-    # First try the custom discovery endpoint
+
+async def _async_get_custom_discovery_info(
+    hass, session, proto, host, port, headers
+):
+    """Get discovery information from the endpoint of this integration.
+
+    Returns the information, or None and whether the endpoint is missing.
+    Information received before is revalidated with a conditional request.
+    """
     url = API_URL.format(proto=proto, host=host, port=port)
+    validators = hass.data.setdefault(DATA_DISCOVERY_VALIDATORS, {})
+    validator = validators.get(url)
+    if validator is not None:
+        headers = {**headers, hdrs.IF_NONE_MATCH: validator[0]}
     try:
         async with session.get(url, headers=headers) as resp:
+            if resp.status == 304 and validator is not None:
+                _LOGGER.debug("Discovery info from custom endpoint not modified")
+                return validator[1], False
             if resp.status == 200:
                 json = await resp.json()
                 if isinstance(json, dict) and "uuid" in json:
                     _LOGGER.debug("Got discovery info from custom endpoint")
-                    return json
+                    etag = resp.headers.get(hdrs.ETAG)
+                    if etag:
+                        validators[url] = (etag, json)
+                    else:
+                        validators.pop(url, None)
+                    return json, False
             elif resp.status == 401:
                 raise InvalidAuth()
             elif resp.status == 404:
                 _LOGGER.debug("Custom discovery endpoint not found, trying fallback")
+                return None, True
     except Exception as e:
         if isinstance(e, InvalidAuth):
             raise
         _LOGGER.debug("Failed to get custom discovery info: %s", e)
+    return None, False
+
 
-    # Fallback: Try standard Home Assistant API endpoints
+async def _async_get_fallback_discovery_info(session, proto, host, port, headers):
+    """Build discovery information from standard API endpoints."""
     _LOGGER.info("Using fallback discovery method")
-    
-    # Get basic API info
-    api_url = FALLBACK_API_URL.format(proto=proto, host=host, port=port)
-    try:
-        async with session.get(api_url, headers=headers) as resp:
-            if resp.status == 401:
-                raise InvalidAuth()
-            if resp.status != 200:
-                raise ApiProblem(f"API returned {resp.status}")
-            api_info = await resp.json()
-    except Exception as e:
-        if isinstance(e, InvalidAuth):
-            raise
-        _LOGGER.error("Failed to connect to API: %s", e)
-        raise CannotConnect() from e
 
-    # Get config info for location name
-    config_url = CONFIG_API_URL.format(proto=proto, host=host, port=port)
-    try:
-        async with session.get(config_url, headers=headers) as resp:
-            if resp.status != 200:
-                raise ApiProblem(f"Config API returned {resp.status}")
-            config_info = await resp.json()
-    except Exception as e:
-        _LOGGER.error("Failed to get config: %s", e)
-        config_info = {}
+    async def _async_get_api_info():
+        """Get basic API info."""
+        api_url = FALLBACK_API_URL.format(proto=proto, host=host, port=port)
+        try:
+            async with session.get(api_url, headers=headers) as resp:
+                if resp.status == 401:
+                    raise InvalidAuth()
+                if resp.status != 200:
+                    raise ApiProblem(f"API returned {resp.status}")
+                return await resp.json()
+        except Exception as e:
+            if isinstance(e, InvalidAuth):
+                raise
+            _LOGGER.error("Failed to connect to API: %s", e)
+            raise CannotConnect() from e
+
+    async def _async_get_config_info():
+        """Get config info for location name."""
+        config_url = CONFIG_API_URL.format(proto=proto, host=host, port=port)
+        try:
+            async with session.get(config_url, headers=headers) as resp:
+                if resp.status != 200:
+                    raise ApiProblem(f"Config API returned {resp.status}")
+                return await resp.json()
+        except Exception as e:
+            _LOGGER.error("Failed to get config: %s", e)
+            return {}
+
+    # Both requests are independent of each other
+    api_info, config_info = await asyncio.gather(
+        _async_get_api_info(), _async_get_config_info()
+    )
 
     # Check Home Assistant version
     if "message" in api_info:
@@ -120,3 +171,56 @@ async def async_get_discovery_info(hass, host, port, secure, access_token, verif
     
     _LOGGER.info("Created fallback discovery info for %s", location_name)
     return discovery_info
+
+
+class DiscoveryCache:
+    """Discovery information of a remote instance, fetched again when outdated.
+
+    Remembers if the remote instance lacks the discovery endpoint of this
+    integration for a while, so the fallback endpoints are used right away
+    instead of failing with the custom one first every time.
+    """
+
+    def __init__(self, hass, host, port, secure, access_token, verify_ssl):
+        """Initialize a new DiscoveryCache instance."""
+        self._hass = hass
+        self._host = host
+        self._port = port
+        self._proto = "https" if secure else "http"
+        self._headers = _headers(access_token)
+        self._verify_ssl = verify_ssl
+        self._info = None
+        self._expires = 0.0
+        self._custom_missing_until = 0.0
+
+    def invalidate(self):
+        """Fetch information again on next use, e.g. after a failed connect."""
+        self._info = None
+
+    async def async_get(self):
+        """Return cached discovery information or fetch it."""
+        now = time.monotonic()
+        if self._info is not None and now < self._expires:
+            return self._info
+
+        session = async_get_clientsession(self._hass, self._verify_ssl)
+        info = None
+        if now >= self._custom_missing_until:
+            info, missing = await _async_get_custom_discovery_info(
+                self._hass,
+                session,
+                self._proto,
+                self._host,
+                self._port,
+                self._headers,
+            )
+            if missing:
+                self._custom_missing_until = now + DISCOVERY_MISSING_TTL
+        if info is None:
+            info = await _async_get_fallback_discovery_info(
+                session, self._proto, self._host, self._port, self._headers
+            )
+
+        self._info = info
+        self._expires = time.monotonic() + DISCOVERY_CACHE_TTL
+        return info
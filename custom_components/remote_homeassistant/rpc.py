@@ -0,0 +1,119 @@
+"""Request/response handling on top of the remote websocket connection."""
+from __future__ import annotations
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable
+
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import MAX_IN_FLIGHT_REQUESTS, REQUEST_TIMEOUT
+
+
+class ConnectionClosed(HomeAssistantError):
+    """Error to indicate the connection closed before a reply arrived."""
+
+
+class RpcClient:
+    """Match replies of the remote instance with requests and subscriptions.
+
+    Requests return the result message and are forgotten once it arrived or
+    the call timed out. Subscriptions keep their handler until the connection
+    is reset, since events keep arriving with the same id.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[dict[str, Any]], Awaitable[None]],
+        max_in_flight: int = MAX_IN_FLIGHT_REQUESTS,
+    ):
+        """Initialize a new RpcClient instance."""
+        self._send = send
+        self._id = 1
+        self._pending: dict[int, asyncio.Future] = {}
+        self._subscriptions: dict[int, tuple[Callable, bool]] = {}
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self.timed_out = 0
+
+    @property
+    def pending(self) -> int:
+        """Return number of requests waiting for a reply."""
+        return len(self._pending)
+
+    def _next_id(self) -> int:
+        _id = self._id
+        self._id += 1
+        return _id
+
+    async def request(
+        self,
+        message: dict[str, Any],
+        timeout: float | None = REQUEST_TIMEOUT,
+        limited: bool = True,
+    ) -> dict[str, Any]:
+        """Send a request and return the result message.
+
+        Requests beyond the in-flight limit wait for a free slot before being
+        sent. Set limited to False for requests that must not be delayed by
+        that, like heartbeats.
+        """
+        if not limited:
+            return await self._request(message, timeout)
+        async with self._in_flight:
+            return await self._request(message, timeout)
+
+    async def _request(self, message, timeout):
+        _id = self._next_id()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[_id] = future
+        try:
+            await self._send({"id": _id, **message})
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+        finally:
+            self._pending.pop(_id, None)
+
+    async def send(self, message: dict[str, Any]) -> None:
+        """Send a request whose reply is not needed."""
+        await self._send({"id": self._next_id(), **message})
+
+    async def subscribe(
+        self, handler: Callable[[dict[str, Any]], Any], message: dict[str, Any]
+    ) -> int:
+        """Send a subscription, handler receives its result and all events."""
+        _id = self._next_id()
+        self._subscriptions[_id] = (handler, inspect.iscoroutinefunction(handler))
+        await self._send({"id": _id, **message})
+        return _id
+
+    async def dispatch(self, message: dict[str, Any]) -> None:
+        """Pass a result or event message to whoever waits for it."""
+        _id = message.get("id")
+        future = self._pending.pop(_id, None)
+        if future is not None:
+            if not future.done():
+                future.set_result(message)
+            return
+
+        subscription = self._subscriptions.get(_id)
+        if subscription is None:
+            return
+
+        # Failed subscriptions never get events
+        if message["type"] == "result" and not message["success"]:
+            del self._subscriptions[_id]
+
+        handler, is_coroutine = subscription
+        if is_coroutine:
+            await handler(message)
+        else:
+            handler(message)
+
+    def reset(self) -> None:
+        """Fail pending requests and drop subscriptions of a closed connection."""
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionClosed("Remote connection closed"))
+        self._pending.clear()
+        self._subscriptions.clear()
@@ -1,25 +1,123 @@
 """Sensor platform for connection status.."""
-from homeassistant.const import CONF_HOST, CONF_PORT, CONF_VERIFY_SSL
+import time
+from datetime import timedelta
+
+from homeassistant.components.sensor import (SensorDeviceClass, SensorEntity,
+                                             SensorStateClass)
+from homeassistant.const import (CONF_HOST, CONF_PORT, CONF_VERIFY_SSL,
+                                 EntityCategory, UnitOfDataRate)
+from homeassistant.core import callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo, Entity
+from homeassistant.helpers.event import async_track_time_interval
 
-from .const import (DOMAIN, CONF_ENTITY_PREFIX,
+from .const import (DOMAIN, CONF_ENTITY_PREFIX, CONF_REMOTE_CONNECTION,
                     CONF_ENTITY_FRIENDLY_NAME_PREFIX,
                     CONF_SECURE, CONF_MAX_MSG_SIZE,
-                    DEFAULT_MAX_MSG_SIZE)
+                    DEFAULT_MAX_MSG_SIZE, DIAGNOSTICS_INTERVAL)
+
+# Key, name, unit and device class of diagnostic sensors, and the counter
+# they report. Rates are per second, the others report the counter as is.
+DIAGNOSTIC_RATES = [
+    ("message_rate", "messages received", "msg/s", None, "messages_received"),
+    (
+        "data_rate",
+        "data received",
+        UnitOfDataRate.BYTES_PER_SECOND,
+        SensorDeviceClass.DATA_RATE,
+        "bytes_received",
+    ),
+]
+DIAGNOSTIC_TOTALS = [
+    ("updates_received", "updates received"),
+    ("updates_published", "updates published"),
+    ("filtered_updates", "updates dropped by filter"),
+    ("aggregated_updates", "updates aggregated"),
+    ("suppressed_updates", "updates dropped by rate control"),
+    ("unchanged_updates", "updates without changes"),
+]
+
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up sensor based ok config entry."""
-    async_add_entities([ConnectionStatusSensor(config_entry)])
+    remote = hass.data[DOMAIN][config_entry.entry_id][CONF_REMOTE_CONNECTION]
+    rates = [
+        DiagnosticSensor(config_entry, key, name, unit, device_class,
+                         SensorStateClass.MEASUREMENT)
+        for key, name, unit, device_class, _ in DIAGNOSTIC_RATES
+    ]
+    totals = [
+        DiagnosticSensor(config_entry, key, name, None, None,
+                         SensorStateClass.TOTAL_INCREASING)
+        for key, name in DIAGNOSTIC_TOTALS
+    ]
+    pending = DiagnosticSensor(config_entry, "pending_requests",
+                               "pending requests", None, None,
+                               SensorStateClass.MEASUREMENT)
+    async_add_entities(
+        [ConnectionStatusSensor(config_entry, remote), *rates, *totals, pending]
+    )
+
+    previous = remote.diagnostic_counters
+    previous_time = time.monotonic()
+
+    @callback
+    def _async_update_diagnostics(now):
+        """Update diagnostic sensors from counters of the connection."""
+        nonlocal previous, previous_time
+        counters = remote.diagnostic_counters
+        current_time = time.monotonic()
+        elapsed = current_time - previous_time
+        for sensor, (_, _, _, _, counter) in zip(rates, DIAGNOSTIC_RATES):
+            sensor.async_set_value(
+                round((counters[counter] - previous[counter]) / elapsed, 1)
+            )
+        for sensor, (key, _) in zip(totals, DIAGNOSTIC_TOTALS):
+            sensor.async_set_value(counters[key])
+        pending.async_set_value(counters["pending_requests"])
+        previous, previous_time = counters, current_time
+
+    # Counted cheaply per message, sensors are only updated periodically
+    config_entry.async_on_unload(
+        async_track_time_interval(
+            hass, _async_update_diagnostics, timedelta(seconds=DIAGNOSTICS_INTERVAL)
+        )
+    )
 
 
 class ConnectionStatusSensor(Entity):
     """Representation of a remote_homeassistant sensor."""
 
-    def __init__(self, config_entry):
+    # Measurements and counters change with every heartbeat and snapshot
+    # chunk, history of them is kept by the diagnostic sensors and metrics
+    _unrecorded_attributes = frozenset(
+        {
+            "sync_processed",
+            "sync_total",
+            "stale_entities",
+            "pending_requests",
+            "timed_out_requests",
+            "suppressed_updates",
+            "aggregated_updates",
+            "attribute_bytes_saved",
+            "skipped_pings",
+            "rtt_min",
+            "rtt_avg",
+            "rtt_p95",
+            "lag_p50",
+            "lag_p95",
+            "lag_p99",
+            "clock_offset",
+            "lag_by_domain",
+            "compression_ratio",
+        }
+    )
+
+    def __init__(self, config_entry, remote):
         """Initialize the remote_homeassistant sensor."""
         self._state = None
         self._entry = config_entry
+        self._remote = remote
 
         proto = 'http' if config_entry.data.get(CONF_SECURE) else 'https'
         host = config_entry.data[CONF_HOST]
@@ -50,6 +148,7 @@ class ConnectionStatusSensor(Entity):
             "entity_prefix": self._entry.options.get(CONF_ENTITY_PREFIX, ""),
             "entity_friendly_name_prefix": self._entry.options.get(CONF_ENTITY_FRIENDLY_NAME_PREFIX, ""),
             "uuid": self.unique_id,
+            **self._remote.status_attributes,
         }
 
     async def async_added_to_hass(self):
@@ -65,3 +164,30 @@ class ConnectionStatusSensor(Entity):
         self.async_on_remove(
             async_dispatcher_connect(self.hass, signal, _update_handler)
         )
+
+
+class DiagnosticSensor(SensorEntity):
+    """Counter or rate of a remote connection, for capacity planning."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_should_poll = False
+
+    def __init__(self, config_entry, key, name, unit, device_class, state_class):
+        """Initialize the diagnostic sensor."""
+        host = config_entry.data[CONF_HOST]
+        port = config_entry.data[CONF_PORT]
+        self._attr_name = f"Remote {host}:{port} {name}"
+        self._attr_unique_id = f"{config_entry.unique_id}_{key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"remote_{config_entry.unique_id}")},
+        )
+
+    @callback
+    def async_set_value(self, value):
+        """Show a new value."""
+        self._attr_native_value = value
+        if self.hass is not None:
+            self.async_write_ha_state()
@@ -0,0 +1,65 @@
+"""Forwarding of local service calls to remote instances."""
+from __future__ import annotations
+import asyncio
+from typing import Any
+
+from homeassistant.const import EVENT_CALL_SERVICE
+from homeassistant.core import Event, HomeAssistant, callback
+
+
+class ServiceCallRouter:
+    """Forward service calls targeting remote entities to their instance.
+
+    A single listener serves all connections. An index maps every local
+    entity id to the connection publishing it and the entity id used by the
+    remote instance, so a call is dispatched in time proportional to the
+    number of targets and only to the connections involved.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize a new ServiceCallRouter instance."""
+        self._entities: dict[str, tuple[Any, str]] = {}
+        hass.bus.async_listen(EVENT_CALL_SERVICE, self._async_forward)
+
+    @callback
+    def async_add(self, entity_id: str, remote_entity_id: str, connection) -> None:
+        """Route calls for a local entity to the connection publishing it."""
+        self._entities[entity_id.lower()] = (connection, remote_entity_id)
+
+    @callback
+    def async_remove(self, entity_id: str) -> None:
+        """Stop routing calls for a local entity."""
+        self._entities.pop(entity_id.lower(), None)
+
+    async def _async_forward(self, event: Event) -> None:
+        """Send local service call to the remote instances owning the targets."""
+        event_data = event.data
+        service_data = event_data["service_data"]
+
+        if not service_data:
+            return
+
+        entity_ids = service_data.get("entity_id", None)
+
+        if not entity_ids:
+            return
+
+        if isinstance(entity_ids, str):
+            entity_ids = (entity_ids,)
+
+        targets: dict[Any, set[str]] = {}
+        for entity_id in entity_ids:
+            target = self._entities.get(entity_id.lower())
+            if target is not None:
+                connection, remote_entity_id = target
+                targets.setdefault(connection, set()).add(remote_entity_id)
+
+        if not targets:
+            return
+
+        await asyncio.gather(
+            *(
+                connection.async_forward_service_call(event_data, list(remote_ids))
+                for connection, remote_ids in targets.items()
+            )
+        )
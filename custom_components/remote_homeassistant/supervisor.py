@@ -0,0 +1,48 @@
+"""Scheduling of connection attempts to remote instances."""
+from __future__ import annotations
+import asyncio
+import random
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from .const import (MAX_CONCURRENT_HANDSHAKES, RETRY_BACKOFF_MAX,
+                    RETRY_BACKOFF_MIN)
+
+# Spreads heartbeat offsets evenly, no matter how many connections there are
+_GOLDEN_RATIO = (5 ** 0.5 - 1) / 2
+
+
+class ConnectionSupervisor:
+    """Coordinates connects and reconnects of all remote connections.
+
+    Discovery, websocket connect and authentication of at most a limited
+    number of connections run at once, so a restart of the main instance does
+    not hit all remote instances at the same moment. Failed attempts are
+    retried with exponential backoff and full jitter, so connections don't
+    retry in lockstep, and heartbeats of connections are spread over the
+    heartbeat interval.
+    """
+
+    def __init__(self, max_handshakes: int = MAX_CONCURRENT_HANDSHAKES):
+        """Initialize a new ConnectionSupervisor instance."""
+        self._handshakes = asyncio.Semaphore(max_handshakes)
+        self._heartbeats = 0
+
+    @asynccontextmanager
+    async def handshake(self) -> AsyncIterator[None]:
+        """Wait for and hold one of the handshake slots."""
+        async with self._handshakes:
+            yield
+
+    @staticmethod
+    def backoff(attempt: int) -> float:
+        """Return seconds to wait before retrying after failed attempts."""
+        return random.uniform(
+            RETRY_BACKOFF_MIN,
+            min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_MIN * 2 ** attempt),
+        )
+
+    def heartbeat_offset(self, interval: float) -> float:
+        """Return delay of the first heartbeat of a new connection."""
+        self._heartbeats += 1
+        return (self._heartbeats * _GOLDEN_RATIO) % 1 * interval
@@ -1,27 +1,93 @@
+import hashlib
+
 import homeassistant
+from aiohttp import hdrs, web
 from homeassistant.components.http import HomeAssistantView
+from homeassistant.const import CONF_HOST, CONF_PORT, EVENT_CORE_CONFIG_UPDATE
+from homeassistant.core import callback
 from homeassistant.helpers.system_info import async_get_system_info
 from homeassistant.helpers.instance_id import async_get as async_get_instance_id
 
+from . import metrics
+from .const import CONF_REMOTE_CONNECTION, DOMAIN
+from .json_codec import json_dumps
+
 ATTR_INSTALLATION_TYPE = "installation_type"
 
 
 class DiscoveryInfoView(HomeAssistantView):
-    """Get all logged errors and warnings."""
+    """Get discovery information of this instance.
+
+    The payload is built once and kept until the core config changes, it is
+    served with an ETag so polling instances can revalidate it cheaply.
+    """
 
     url = "/api/remote_homeassistant/discovery"
     name = "api:remote_homeassistant:discovery"
     requires_auth = True
 
+    def __init__(self, hass):
+        """Initialize a new DiscoveryInfoView instance."""
+        self._body = None
+        self._etag = None
+        hass.bus.async_listen(EVENT_CORE_CONFIG_UPDATE, self._async_invalidate)
+
+    @callback
+    def _async_invalidate(self, event):
+        """Drop cached payload, e.g. the location name changed."""
+        self._body = None
+        self._etag = None
+
     async def get(self, request):
         """Get discovery information."""
+        if self._body is None:
+            hass = request.app["hass"]
+            system_info = await async_get_system_info(hass)
+            body = json_dumps(
+                {
+                    "uuid": await async_get_instance_id(hass),
+                    "location_name": hass.config.location_name,
+                    "ha_version": homeassistant.const.__version__,
+                    "installation_type": system_info[ATTR_INSTALLATION_TYPE],
+                }
+            )
+            self._body = body
+            self._etag = '"%s"' % hashlib.sha1(body.encode()).hexdigest()
+
+        headers = {hdrs.ETAG: self._etag}
+        if_none_match = request.headers.get(hdrs.IF_NONE_MATCH, "")
+        if self._etag in (tag.strip() for tag in if_none_match.split(",")):
+            return web.Response(status=304, headers=headers)
+        return web.Response(
+            text=self._body, content_type="application/json", headers=headers
+        )
+
+
+class MetricsView(HomeAssistantView):
+    """Serve metrics of all remote connections in Prometheus text format."""
+
+    url = "/api/remote_homeassistant/metrics"
+    name = "api:remote_homeassistant:metrics"
+    requires_auth = True
+
+    async def get(self, request):
+        """Get metrics."""
         hass = request.app["hass"]
-        system_info = await async_get_system_info(hass)
-        return self.json(
-            {
-                "uuid": await async_get_instance_id(hass),
-                "location_name": hass.config.location_name,
-                "ha_version": homeassistant.const.__version__,
-                "installation_type": system_info[ATTR_INSTALLATION_TYPE],
+        connections = []
+        for entry_id, data in hass.data.get(DOMAIN, {}).items():
+            entry = hass.config_entries.async_get_entry(entry_id)
+            if entry is None or not isinstance(data, dict):
+                continue
+            connection = data.get(CONF_REMOTE_CONNECTION)
+            if connection is None:
+                continue
+            labels = {
+                "entry": entry.unique_id,
+                "host": f"{entry.data[CONF_HOST]}:{entry.data[CONF_PORT]}",
             }
+            connections.append((labels, connection))
+
+        return web.Response(
+            body=metrics.render(connections).encode(),
+            headers={hdrs.CONTENT_TYPE: metrics.CONTENT_TYPE},
         )
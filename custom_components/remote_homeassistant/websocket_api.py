@@ -0,0 +1,128 @@
+"""Websocket commands offered by a remote node."""
+from __future__ import annotations
+import time
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.auth.permissions.const import POLICY_READ
+from homeassistant.components import websocket_api
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, State, callback
+
+from .compressed_state import (ENTITY_EVENT_ADD, ENTITY_EVENT_CHANGE,
+                               ENTITY_EVENT_REMOVE, compress_state,
+                               compressed_state_diff)
+from .const import (CONF_EXCLUDE_DOMAINS, CONF_EXCLUDE_ENTITIES, CONF_FILTER,
+                    CONF_INCLUDE_DOMAINS, CONF_INCLUDE_ENTITIES)
+from .filters import EntityFilter
+
+TYPE_SUBSCRIBE = "remote_homeassistant/subscribe"
+TYPE_TIME = "remote_homeassistant/time"
+
+
+@callback
+def async_setup(hass: HomeAssistant) -> None:
+    """Register websocket commands."""
+    websocket_api.async_register_command(hass, websocket_subscribe)
+    websocket_api.async_register_command(hass, websocket_time)
+
+
+@websocket_api.websocket_command({vol.Required("type"): TYPE_TIME})
+@callback
+def websocket_time(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return current time of this instance, used to measure clock offset."""
+    connection.send_result(msg["id"], {"time": time.time()})
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): TYPE_SUBSCRIBE,
+        vol.Optional(CONF_INCLUDE_DOMAINS, default=[]): [str],
+        vol.Optional(CONF_INCLUDE_ENTITIES, default=[]): [str],
+        vol.Optional(CONF_EXCLUDE_DOMAINS, default=[]): [str],
+        vol.Optional(CONF_EXCLUDE_ENTITIES, default=[]): [str],
+        vol.Optional(CONF_FILTER, default=[]): [dict],
+    }
+)
+@callback
+def websocket_subscribe(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Subscribe to filtered entity changes.
+
+    Works like subscribe_entities, but include/exclude lists and filters of
+    the main instance are applied before anything is sent, so states the main
+    instance would discard never go on the wire. Like subscribe_entities, only
+    entities the user may read are sent.
+    """
+    entity_filter = EntityFilter(msg)
+    if connection.user.permissions.access_all_entities(POLICY_READ):
+        can_read = None
+    else:
+        check_entity = connection.user.permissions.check_entity
+
+        def can_read(entity_id: str) -> bool:
+            return check_entity(entity_id, POLICY_READ)
+    # Last state sent per entity, diffs are relative to it
+    sent: dict[str, State] = {}
+
+    @callback
+    def _forward_entity_changes(event: Event) -> None:
+        """Forward state change of an included entity."""
+        entity_id = event.data["entity_id"]
+        new_state = event.data["new_state"]
+
+        if new_state is None:
+            if sent.pop(entity_id, None) is not None:
+                entity_filter.forget(entity_id)
+                connection.send_message(
+                    websocket_api.event_message(
+                        msg["id"], {ENTITY_EVENT_REMOVE: [entity_id]}
+                    )
+                )
+            return
+
+        if can_read is not None and not can_read(entity_id):
+            return
+        if not entity_filter.accepts(entity_id, new_state.state, new_state.attributes):
+            return
+
+        old_state = sent.get(entity_id)
+        sent[entity_id] = new_state
+        if old_state is None:
+            event_data = {ENTITY_EVENT_ADD: {entity_id: compress_state(new_state)}}
+        else:
+            diff = compressed_state_diff(old_state, new_state)
+            if diff is None:
+                return
+            event_data = {ENTITY_EVENT_CHANGE: {entity_id: diff}}
+
+        connection.send_message(websocket_api.event_message(msg["id"], event_data))
+
+    connection.subscriptions[msg["id"]] = hass.bus.async_listen(
+        EVENT_STATE_CHANGED, _forward_entity_changes
+    )
+
+    # All entity ids are returned so the main instance can offer excluded
+    # entities in its options
+    entity_ids = hass.states.async_entity_ids()
+    if can_read is not None:
+        entity_ids = [entity_id for entity_id in entity_ids if can_read(entity_id)]
+    connection.send_result(msg["id"], {"entity_ids": entity_ids})
+
+    added = {}
+    for state in hass.states.async_all():
+        if can_read is not None and not can_read(state.entity_id):
+            continue
+        if entity_filter.accepts(state.entity_id, state.state, state.attributes):
+            sent[state.entity_id] = state
+            added[state.entity_id] = compress_state(state)
+    connection.send_message(
+        websocket_api.event_message(msg["id"], {ENTITY_EVENT_ADD: added})
+    )
@@ -0,0 +1 @@
+"""Tests for the Remote Home-Assistant integration."""
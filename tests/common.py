@@ -0,0 +1,47 @@
+"""Helpers for Remote Home-Assistant tests."""
+import asyncio
+
+from homeassistant.const import (CONF_ACCESS_TOKEN, CONF_HOST, CONF_PORT,
+                                 CONF_VERIFY_SSL)
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from benchmarks.fake_remote import ACCESS_TOKEN, UUID
+from custom_components.remote_homeassistant.const import (CONF_REMOTE_CONNECTION,
+                                                          CONF_SECURE, DOMAIN)
+
+ENTRY_ID = "fake_remote_entry"
+
+
+async def async_setup_remote(hass, remote, options=None):
+    """Set up a config entry connecting to a fake remote instance."""
+    # Populated by the frontend, proxied services are removed from it
+    hass.data.setdefault("service_description_cache", {})
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        entry_id=ENTRY_ID,
+        unique_id=UUID,
+        title="Fake remote",
+        data={
+            CONF_HOST: "127.0.0.1",
+            CONF_PORT: remote.port,
+            CONF_ACCESS_TOKEN: ACCESS_TOKEN,
+            CONF_SECURE: False,
+            CONF_VERIFY_SSL: False,
+        },
+        options=options or {},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    return entry
+
+
+def remote_connection(hass, entry):
+    """Return connection of a config entry."""
+    return hass.data[DOMAIN][entry.entry_id][CONF_REMOTE_CONNECTION]
+
+
+async def async_wait_for(condition, timeout=5):
+    """Wait until condition is true, raises TimeoutError otherwise."""
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
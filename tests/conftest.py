@@ -0,0 +1,27 @@
+"""Fixtures for Remote Home-Assistant tests."""
+import pytest
+
+from benchmarks.fake_remote import FakeRemote
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable custom integrations in all tests."""
+    yield
+
+
+@pytest.fixture
+async def fake_remote(socket_enabled):
+    """Return factory of fake remote instances, stopped after the test."""
+    remotes = []
+
+    async def start(**kwargs):
+        remote = FakeRemote(**kwargs)
+        await remote.async_start()
+        remotes.append(remote)
+        return remote
+
+    yield start
+
+    for remote in remotes:
+        await remote.async_stop()
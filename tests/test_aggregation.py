@@ -0,0 +1,80 @@
+"""Tests for publishing numeric states as windowed aggregates."""
+import asyncio
+
+import pytest
+
+from custom_components.remote_homeassistant.aggregation import WindowAggregator
+
+ENTITY_ID = "sensor.temperature"
+WINDOW = 0.1
+
+
+def _aggregator(hass, aggregate):
+    published = []
+    aggregator = WindowAggregator(
+        hass,
+        {"filter": [{"entity_id": "sensor.*", "aggregate": aggregate, "window": WINDOW}]},
+    )
+    aggregator.async_start(lambda *args: published.append(args))
+    return aggregator, published
+
+
+async def _window(aggregator, states):
+    """Feed states after the first one into one window and let it close."""
+    assert aggregator.accepts(ENTITY_ID, "0", {})
+    for state in states:
+        assert not aggregator.accepts(ENTITY_ID, state, {"state": state})
+    await asyncio.sleep(WINDOW * 1.5)
+
+
+@pytest.mark.parametrize(
+    "aggregate,states,result",
+    [
+        ("mean", ["1", "2", "4"], "2.3"),
+        ("mean", ["20.5", "21.25"], "20.875"),
+        ("min", ["3.10", "2.50", "2.70"], "2.50"),
+        ("max", ["3.10", "2.50", "2.70"], "3.10"),
+        ("last", ["3.10", "2.50", "2.70"], "2.70"),
+    ],
+)
+async def test_window_result(hass, aggregate, states, result):
+    """Test a closed window publishes its aggregate with the latest attributes."""
+    aggregator, published = _aggregator(hass, aggregate)
+    await _window(aggregator, states)
+    assert published == [(ENTITY_ID, result, {"state": states[-1]})]
+    assert aggregator.aggregated == len(states)
+
+
+async def test_no_policy(hass):
+    """Test entities without policy are published as is."""
+    aggregator, _ = _aggregator(hass, "mean")
+    assert aggregator.accepts("light.kitchen", "on", {})
+    assert aggregator.accepts("light.kitchen", "off", {})
+
+
+async def test_non_numeric_discards_window(hass):
+    """Test a non-numeric state is published right away, dropping the window."""
+    aggregator, published = _aggregator(hass, "mean")
+    assert aggregator.accepts(ENTITY_ID, "1", {})
+    assert not aggregator.accepts(ENTITY_ID, "2", {})
+    assert aggregator.accepts(ENTITY_ID, "unavailable", {})
+
+    await asyncio.sleep(WINDOW * 1.5)
+    assert published == []
+    # Starts a new window
+    assert not aggregator.accepts(ENTITY_ID, "3", {})
+    await asyncio.sleep(WINDOW * 1.5)
+    assert published == [(ENTITY_ID, "3.0", {})]
+
+
+async def test_stop_drops_windows(hass):
+    """Test open windows are not published once stopped."""
+    aggregator, published = _aggregator(hass, "mean")
+    assert aggregator.accepts(ENTITY_ID, "1", {})
+    assert not aggregator.accepts(ENTITY_ID, "2", {})
+    aggregator.async_stop()
+
+    await asyncio.sleep(WINDOW * 1.5)
+    assert published == []
+    # First state after reconnecting is published right away
+    assert aggregator.accepts(ENTITY_ID, "3", {})
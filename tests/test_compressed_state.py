@@ -0,0 +1,80 @@
+"""Tests for the compressed entity state format."""
+from datetime import timedelta
+
+import pytest
+from homeassistant.core import Context, State
+from homeassistant.util import dt as dt_util
+
+from custom_components.remote_homeassistant.compressed_state import (
+    apply_state_diff, compress_state, compressed_state_diff)
+
+NOW = dt_util.utcnow()
+LATER = NOW + timedelta(seconds=5)
+CONTEXT = Context()
+
+
+def _state(state, attributes, last_changed=NOW, last_updated=None, context=CONTEXT):
+    return State(
+        "sensor.power",
+        state,
+        attributes,
+        last_changed=last_changed,
+        last_updated=last_updated or last_changed,
+        context=context,
+    )
+
+
+def _normalized(compressed):
+    """Return compressed state with last_updated filled in if omitted."""
+    return {
+        **compressed,
+        "lu": compressed.get("lu", compressed["lc"]),
+    }
+
+
+@pytest.mark.parametrize(
+    "new",
+    [
+        _state("2", {"unit": "W", "rssi": -60}, LATER),
+        _state("1", {"unit": "W", "rssi": -70}, NOW, LATER),
+        _state("1", {"unit": "W"}, NOW, LATER),
+        _state("1", {"unit": "kW", "extra": [1, 2]}, NOW, LATER, Context()),
+        _state("3", {}, LATER, context=Context()),
+    ],
+)
+def test_diff_round_trip(new):
+    """Test applying a diff to the old state results in the new one."""
+    old = _state("1", {"unit": "W", "rssi": -60})
+    compressed = compress_state(old)
+    diff = compressed_state_diff(old, new)
+    assert diff is not None
+
+    apply_state_diff(compressed, diff)
+    assert _normalized(compressed) == _normalized(compress_state(new))
+
+
+def test_diff_unchanged():
+    """Test there is no diff between equal states."""
+    old = _state("1", {"unit": "W"})
+    assert compressed_state_diff(old, _state("1", {"unit": "W"})) is None
+
+
+def test_diff_only_sends_changes():
+    """Test unchanged attributes are left out of a diff."""
+    old = _state("1", {"unit": "W", "forecast": [1, 2, 3], "gone": True})
+    new = _state("1", {"unit": "W", "forecast": [1, 2, 3], "rssi": -60}, NOW, LATER)
+    assert compressed_state_diff(old, new) == {
+        "+": {"lu": LATER.timestamp(), "a": {"rssi": -60}},
+        "-": {"a": ["gone"]},
+    }
+
+
+def test_compress_state():
+    """Test last_updated is only sent if it differs from last_changed."""
+    assert compress_state(_state("1", {"unit": "W"})) == {
+        "s": "1",
+        "a": {"unit": "W"},
+        "c": CONTEXT.id,
+        "lc": NOW.timestamp(),
+    }
+    assert compress_state(_state("1", {}, NOW, LATER))["lu"] == LATER.timestamp()
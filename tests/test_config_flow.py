@@ -0,0 +1,45 @@
+"""Tests for the config and options flow."""
+from unittest.mock import patch
+
+from custom_components.remote_homeassistant.config_flow import \
+    OptionsFlowHandler
+from custom_components.remote_homeassistant.const import (CONF_INGEST_MODE,
+                                                          CONF_RECONNECT_MODE,
+                                                          CONF_SERVICE_PREFIX,
+                                                          CONF_SNAPSHOT_TIME_BUDGET,
+                                                          CONF_SUBSCRIBE_EVENTS,
+                                                          INGEST_MODE_EVENTS,
+                                                          RECONNECT_MODE_STALE)
+
+from .common import async_setup_remote
+
+
+async def test_options_keep_yaml_only_options(hass, fake_remote):
+    """Test saving options keeps options only configurable in YAML."""
+    remote = await fake_remote(entities=1)
+    entry = await async_setup_remote(
+        hass,
+        remote,
+        {CONF_SNAPSHOT_TIME_BUDGET: 20, CONF_INGEST_MODE: INGEST_MODE_EVENTS},
+    )
+    flow = OptionsFlowHandler(entry)
+    flow.hass = hass
+
+    # Only the first and the last step are of interest
+    with patch.object(flow, "async_step_domain_entity_filters") as next_step:
+        await flow.async_step_init(
+            {CONF_SERVICE_PREFIX: "fake", CONF_RECONNECT_MODE: RECONNECT_MODE_STALE}
+        )
+    next_step.assert_called_once_with()
+    result = await flow.async_step_events({})
+
+    assert result["type"] == "create_entry"
+    assert result["data"] == {
+        CONF_SNAPSHOT_TIME_BUDGET: 20,
+        CONF_INGEST_MODE: INGEST_MODE_EVENTS,
+        CONF_SERVICE_PREFIX: "fake",
+        CONF_RECONNECT_MODE: RECONNECT_MODE_STALE,
+        CONF_SUBSCRIBE_EVENTS: [],
+    }
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,18 @@
+"""Tests for counters of a remote connection."""
+import pytest
+
+from custom_components.remote_homeassistant import _frame_size
+
+
+@pytest.mark.parametrize(
+    "payload,size",
+    [
+        ('{"s": "on"}', 11),
+        ('{"s": "23 °C"}', 15),
+        ('{"friendly_name": "Küche"}', 27),
+        (b'{"s": "on"}', 11),
+    ],
+)
+def test_frame_size(payload, size):
+    """Test frames are counted in bytes, not characters."""
+    assert _frame_size(payload) == size
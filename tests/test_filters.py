@@ -0,0 +1,108 @@
+"""Tests for filters applied to remote entities."""
+from typing import NamedTuple, Optional, Pattern
+
+from custom_components.remote_homeassistant.const import (CONF_EXCLUDE_DOMAINS,
+                                                          CONF_EXCLUDE_ENTITIES,
+                                                          CONF_FILTER,
+                                                          CONF_INCLUDE_DOMAINS,
+                                                          CONF_INCLUDE_ENTITIES)
+from custom_components.remote_homeassistant.filters import (EntityFilter,
+                                                            FirstMatch,
+                                                            compile_pattern)
+
+
+class _Rule(NamedTuple):
+    entity_id: Optional[Pattern[str]]
+    name: str
+
+
+def _rule(name, pattern=None):
+    return _Rule(compile_pattern({"entity_id": pattern}), name)
+
+
+def test_first_match():
+    """Test the first rule with a matching pattern applies."""
+    rules = FirstMatch(
+        [None, _rule("lights", "light.*"), _rule("kitchen", "*.kitchen*"), _rule("all")]
+    )
+    assert rules
+    assert rules.get("light.kitchen").name == "lights"
+    assert rules.get("sensor.kitchen_power").name == "kitchen"
+    assert rules.get("sensor.power").name == "all"
+
+
+def test_first_match_without_rules():
+    """Test nothing matches without rules."""
+    rules = FirstMatch([None])
+    assert not rules
+    assert rules.get("light.kitchen") is None
+
+
+def test_first_match_cached():
+    """Test matches are cached per entity until forgotten."""
+    rules = FirstMatch([_rule("lights", "light.*")])
+    assert rules.get("light.kitchen").name == "lights"
+    rules._rules.clear()
+    assert rules.get("light.kitchen").name == "lights"
+
+    rules.forget("light.kitchen")
+    assert rules.get("light.kitchen") is None
+
+
+def test_include_exclude():
+    """Test excluded entities and domains take precedence over included ones."""
+    entity_filter = EntityFilter(
+        {
+            CONF_INCLUDE_DOMAINS: ["light"],
+            CONF_INCLUDE_ENTITIES: ["sensor.power", "light.hall"],
+            CONF_EXCLUDE_ENTITIES: ["light.hall"],
+            CONF_EXCLUDE_DOMAINS: ["switch"],
+        }
+    )
+    assert entity_filter.is_included("light.kitchen")
+    assert entity_filter.is_included("sensor.power")
+    assert not entity_filter.is_included("light.hall")
+    assert not entity_filter.is_included("sensor.energy")
+    assert not entity_filter.accepts("sensor.energy", "1", {})
+
+
+def test_thresholds():
+    """Test states outside thresholds of matching rules are rejected."""
+    entity_filter = EntityFilter(
+        {
+            CONF_FILTER: [
+                {"entity_id": "sensor.power*", "above": 1000},
+                {"unit_of_measurement": "°C", "below": -30, "above": 60},
+            ]
+        }
+    )
+    assert entity_filter.accepts("sensor.power", "500", {})
+    assert not entity_filter.accepts("sensor.power", "1500", {})
+    assert entity_filter.accepts("sensor.energy", "1500", {})
+    assert not entity_filter.accepts("sensor.outside", "-40", {"unit_of_measurement": "°C"})
+    assert entity_filter.accepts("sensor.outside", "-40", {"unit_of_measurement": "°F"})
+    # Non-numeric states are never rejected by thresholds
+    assert entity_filter.accepts("sensor.power", "unavailable", {})
+
+
+def test_zero_threshold_ignored():
+    """Test thresholds of 0 have no effect, as they always had."""
+    entity_filter = EntityFilter(
+        {CONF_FILTER: [{"entity_id": "sensor.*", "above": 0, "below": 0}]}
+    )
+    assert entity_filter.accepts("sensor.power", "-5", {})
+    assert entity_filter.accepts("sensor.power", "5", {})
+    assert entity_filter.rules_for("sensor.power") == ()
+
+
+def test_verdict_cached():
+    """Test verdicts are cached per entity until forgotten."""
+    entity_filter = EntityFilter({CONF_EXCLUDE_ENTITIES: ["sensor.power"]})
+    assert entity_filter.rules_for("sensor.power") is None
+    assert entity_filter.rules_for("sensor.energy") == ()
+
+    entity_filter._blacklist_e = frozenset(["sensor.energy"])
+    assert entity_filter.rules_for("sensor.energy") == ()
+
+    entity_filter.forget("sensor.energy")
+    assert entity_filter.rules_for("sensor.energy") is None
@@ -0,0 +1,24 @@
+"""Tests for heartbeats sent to a remote instance."""
+from unittest.mock import patch
+
+from custom_components.remote_homeassistant import (STATE_CONNECTED,
+                                                    RemoteConnection)
+
+from .common import async_setup_remote, async_wait_for
+
+
+async def test_heartbeat_after_auth(hass, fake_remote):
+    """Test heartbeats are only sent once authenticated."""
+    remote = await fake_remote(entities=0)
+    states = []
+
+    async def heartbeat_loop(connection):
+        states.append(connection._connection_state)
+
+    with patch.object(RemoteConnection, "_heartbeat_loop", heartbeat_loop):
+        entry = await async_setup_remote(hass, remote)
+        await async_wait_for(lambda: states)
+
+    assert states == [STATE_CONNECTED]
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
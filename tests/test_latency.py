@@ -0,0 +1,58 @@
+"""Tests for latency statistics of remote connections."""
+import time
+
+from custom_components.remote_homeassistant.latency import (LatencyStats,
+                                                            ReplicationLag)
+
+
+def test_latency_stats():
+    """Test statistics are reported in milliseconds."""
+    stats = LatencyStats(samples=4)
+    assert stats.min is None and stats.percentile(50) is None
+    for seconds in (0.5, 0.001, 0.002, 0.003, 0.004):
+        stats.add(seconds)
+    # Oldest sample was dropped
+    assert len(stats) == 4
+    assert stats.min == 1.0
+    assert stats.avg == 2.5
+    assert stats.percentile(50) == 2.0
+    assert stats.percentile(99) == 4.0
+
+
+def test_lag_clocks_in_sync():
+    """Test lag without clock readings assumes clocks in sync."""
+    lag = ReplicationLag()
+    lag.add("sensor.power", time.time() - 2)
+    summary = lag.summary()
+    assert 1990 < summary["lag_p50"] < 2100
+    assert summary["clock_offset"] == 0
+    assert list(summary["lag_by_domain"]) == ["sensor"]
+
+
+def test_lag_behind_is_not_offset():
+    """Test a link that is always behind reports its lag."""
+    lag = ReplicationLag()
+    now = time.time()
+    lag.add_clock_reading(now - 0.01, now - 0.005, now)
+    for _ in range(20):
+        lag.add("sensor.power", time.time() - 10)
+    summary = lag.summary()
+    assert 9990 < summary["lag_p50"] < 10100
+    assert abs(summary["clock_offset"]) < 1
+
+
+def test_lag_clock_offset():
+    """Test the reading with the smallest round trip time sets the offset."""
+    lag = ReplicationLag()
+    now = time.time()
+    # Remote clock is 5 seconds ahead
+    lag.add_clock_reading(now - 1.0, now + 5.2, now)
+    lag.add_clock_reading(now - 0.02, now + 4.99, now)
+    lag.add_clock_reading(now - 0.5, now + 4.5, now)
+    assert round(lag.offset, 3) == -5.0
+
+    lag.add("sensor.power", time.time() + 5 - 0.1)
+    assert 90 < lag.summary()["lag_p50"] < 200
+
+    lag.clear_clock()
+    assert lag.offset == 0
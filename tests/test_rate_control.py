@@ -0,0 +1,86 @@
+"""Tests for throttling and deadband of remote state updates."""
+import asyncio
+
+from custom_components.remote_homeassistant.rate_control import RateLimiter
+
+ENTITY_ID = "sensor.power"
+
+
+def _limiter(hass, **policy):
+    published = []
+    limiter = RateLimiter(hass, {"filter": [{"entity_id": "sensor.*", **policy}]})
+    limiter.async_start(lambda *args: published.append(args))
+    return limiter, published
+
+
+async def test_no_policy(hass):
+    """Test updates of entities without policy are always accepted."""
+    limiter, _ = _limiter(hass, min_interval=10)
+    assert limiter.accepts("light.kitchen", "on", {})
+    assert limiter.accepts("light.kitchen", "off", {})
+    assert limiter.suppressed == 0
+
+
+async def test_min_interval_publishes_latest(hass):
+    """Test updates within min_interval are held back, the latest published."""
+    limiter, published = _limiter(hass, min_interval=0.1)
+    assert limiter.accepts(ENTITY_ID, "1", {})
+    assert not limiter.accepts(ENTITY_ID, "2", {"n": 2})
+    assert not limiter.accepts(ENTITY_ID, "3", {"n": 3})
+    assert published == []
+
+    await asyncio.sleep(0.15)
+    assert published == [(ENTITY_ID, "3", {"n": 3})]
+    assert limiter.suppressed == 1
+
+    # Interval starts again with the held back update
+    assert not limiter.accepts(ENTITY_ID, "4", {})
+    await asyncio.sleep(0.15)
+    assert published[-1] == (ENTITY_ID, "4", {})
+
+
+async def test_deadband(hass):
+    """Test updates within the deadband of the published state are dropped."""
+    limiter, _ = _limiter(hass, deadband=1.0)
+    assert limiter.accepts(ENTITY_ID, "10", {})
+    assert not limiter.accepts(ENTITY_ID, "10.5", {})
+    assert not limiter.accepts(ENTITY_ID, "9.5", {})
+    assert limiter.accepts(ENTITY_ID, "11.5", {})
+    # Relative to the last published state
+    assert not limiter.accepts(ENTITY_ID, "11", {})
+    # Non-numeric states are never within the deadband
+    assert limiter.accepts(ENTITY_ID, "unavailable", {})
+    assert limiter.suppressed == 3
+
+
+async def test_deadband_percent(hass):
+    """Test deadband relative to the published state."""
+    limiter, _ = _limiter(hass, deadband_percent=10)
+    assert limiter.accepts(ENTITY_ID, "200", {})
+    assert not limiter.accepts(ENTITY_ID, "215", {})
+    assert limiter.accepts(ENTITY_ID, "225", {})
+
+
+async def test_deadband_cancels_held_update(hass):
+    """Test an update back within the deadband drops a held back one."""
+    limiter, published = _limiter(hass, min_interval=0.1, deadband=1.0)
+    assert limiter.accepts(ENTITY_ID, "10", {})
+    assert not limiter.accepts(ENTITY_ID, "15", {})
+    assert not limiter.accepts(ENTITY_ID, "10.2", {})
+
+    await asyncio.sleep(0.15)
+    assert published == []
+    assert limiter.suppressed == 2
+
+
+async def test_stop_drops_held_updates(hass):
+    """Test held back updates are not published once stopped."""
+    limiter, published = _limiter(hass, min_interval=0.1)
+    assert limiter.accepts(ENTITY_ID, "1", {})
+    assert not limiter.accepts(ENTITY_ID, "2", {})
+    limiter.async_stop()
+
+    await asyncio.sleep(0.15)
+    assert published == []
+    # History is gone, the next update is published right away
+    assert limiter.accepts(ENTITY_ID, "3", {})
@@ -0,0 +1,36 @@
+"""Tests for mirrored entities across reconnects."""
+from homeassistant.const import EVENT_STATE_CHANGED
+
+from custom_components.remote_homeassistant.const import (CONF_RECONNECT_MODE,
+                                                          RECONNECT_MODE_STALE)
+
+from .common import async_setup_remote, async_wait_for
+
+
+async def test_reconnect_resyncs_by_diff(hass, fake_remote):
+    """Test only changes are published after reconnecting."""
+    remote = await fake_remote(entities=3)
+    entry = await async_setup_remote(
+        hass, remote, {CONF_RECONNECT_MODE: RECONNECT_MODE_STALE}
+    )
+    await async_wait_for(lambda: hass.states.get("sensor.synthetic_2"))
+    unchanged = hass.states.get("sensor.synthetic_0")
+
+    changes = []
+    hass.bus.async_listen(
+        EVENT_STATE_CHANGED, lambda event: changes.append(event.data["entity_id"])
+    )
+    del remote.states["sensor.synthetic_2"]
+    remote.states["sensor.synthetic_1"] = {
+        **remote.states["sensor.synthetic_1"],
+        "state": "10",
+    }
+    await remote.async_disconnect()
+    await async_wait_for(lambda: hass.states.get("sensor.synthetic_2") is None)
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.synthetic_0") is unchanged
+    assert hass.states.get("sensor.synthetic_1").state == "10"
+    assert "sensor.synthetic_0" not in changes
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
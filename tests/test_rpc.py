@@ -0,0 +1,159 @@
+"""Tests for requests and subscriptions sent to a remote instance."""
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import aiohttp
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.remote_homeassistant import RemoteConnection
+from custom_components.remote_homeassistant.const import (DATA_SERVICE_ROUTER,
+                                                          DATA_SUPERVISOR,
+                                                          DOMAIN)
+from custom_components.remote_homeassistant.rpc import (ConnectionClosed,
+                                                        RpcClient)
+from custom_components.remote_homeassistant.service_router import \
+    ServiceCallRouter
+from custom_components.remote_homeassistant.supervisor import \
+    ConnectionSupervisor
+
+
+def _client(**kwargs):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    return RpcClient(send, **kwargs), sent
+
+
+def _result(_id, result=None):
+    return {"id": _id, "type": "result", "success": True, "result": result}
+
+
+async def test_request(hass):
+    """Test a request returns the result message with its id."""
+    client, sent = _client()
+    task = asyncio.create_task(client.request({"type": "get_states"}))
+    await asyncio.sleep(0)
+    assert sent == [{"id": 1, "type": "get_states"}]
+    assert client.pending == 1
+
+    await client.dispatch(_result(2, "other"))
+    await client.dispatch(_result(1, []))
+    assert await task == _result(1, [])
+    assert client.pending == 0
+
+
+async def test_request_timeout(hass):
+    """Test a request without reply times out and is forgotten."""
+    client, _ = _client()
+    with pytest.raises(asyncio.TimeoutError):
+        await client.request({"type": "ping"}, 0.01)
+    assert client.pending == 0
+    assert client.timed_out == 1
+
+    # A late reply is ignored
+    await client.dispatch(_result(1))
+
+
+async def test_reset(hass):
+    """Test pending requests fail and subscriptions end on reset."""
+    client, _ = _client()
+    events = []
+    await client.subscribe(events.append, {"type": "subscribe_events"})
+    task = asyncio.create_task(client.request({"type": "get_states"}))
+    await asyncio.sleep(0)
+
+    client.reset()
+    with pytest.raises(ConnectionClosed):
+        await task
+    await client.dispatch({"id": 1, "type": "event", "event": {}})
+    assert events == []
+
+
+async def test_in_flight_limit(hass):
+    """Test requests beyond the limit wait, unless not limited."""
+    client, sent = _client(max_in_flight=1)
+    first = asyncio.create_task(client.request({"type": "first"}))
+    second = asyncio.create_task(client.request({"type": "second"}))
+    ping = asyncio.create_task(client.request({"type": "ping"}, limited=False))
+    await asyncio.sleep(0)
+    assert [message["type"] for message in sent] == ["first", "ping"]
+
+    await client.dispatch(_result(1))
+    await first
+    await asyncio.sleep(0)
+    assert [message["type"] for message in sent] == ["first", "ping", "second"]
+
+    await client.dispatch(_result(2))
+    await client.dispatch(_result(3))
+    await asyncio.gather(second, ping)
+
+
+async def test_subscribe(hass):
+    """Test subscriptions get their result and all events."""
+    client, sent = _client()
+    messages = []
+
+    async def handler(message):
+        messages.append(message)
+
+    _id = await client.subscribe(handler, {"type": "subscribe_events"})
+    assert sent == [{"id": _id, "type": "subscribe_events"}]
+    await client.dispatch(_result(_id))
+    await client.dispatch({"id": _id, "type": "event", "event": 1})
+    await client.dispatch({"id": _id, "type": "event", "event": 2})
+    assert [message["type"] for message in messages] == ["result", "event", "event"]
+
+
+async def test_failed_subscription(hass):
+    """Test failed subscriptions get no events."""
+    client, _ = _client()
+    messages = []
+    _id = await client.subscribe(messages.append, {"type": "unknown"})
+    await client.dispatch(
+        {"id": _id, "type": "result", "success": False, "error": {"code": "x"}}
+    )
+    await client.dispatch({"id": _id, "type": "event", "event": {}})
+    assert len(messages) == 1
+
+
+@pytest.fixture
+def remote_connection(hass):
+    """Return a RemoteConnection that is not connected."""
+    hass.data[DOMAIN] = {
+        DATA_SERVICE_ROUTER: ServiceCallRouter(hass),
+        DATA_SUPERVISOR: ConnectionSupervisor(),
+    }
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="0123456789abcdef0123456789abcdef",
+        data={"host": "127.0.0.1", "port": 8123, "access_token": "token"},
+    )
+    return RemoteConnection(hass, entry)
+
+
+@pytest.mark.parametrize(
+    "closed,error",
+    [
+        (True, None),
+        (False, ConnectionResetError("Cannot write to closing transport")),
+        (False, aiohttp.ClientConnectionError()),
+    ],
+)
+async def test_send_on_closed_connection(hass, remote_connection, closed, error):
+    """Test requests on a closed connection fail with ConnectionClosed."""
+    websocket = Mock(closed=closed, close=AsyncMock())
+    websocket.send_json = AsyncMock(side_effect=error)
+    remote_connection._connection = websocket
+
+    with pytest.raises(ConnectionClosed):
+        await remote_connection.rpc.request({"type": "ping"})
+    assert websocket.send_json.called is not closed
+
+
+async def test_send_without_connection(hass, remote_connection):
+    """Test requests fail with ConnectionClosed while disconnected."""
+    with pytest.raises(ConnectionClosed):
+        await remote_connection.rpc.request({"type": "ping"})
@@ -0,0 +1,86 @@
+"""Tests for forwarding of service calls to remote instances."""
+from unittest.mock import AsyncMock, Mock, patch
+
+from homeassistant.const import EVENT_CALL_SERVICE
+
+from custom_components.remote_homeassistant.const import CONF_ENTITY_PREFIX
+from custom_components.remote_homeassistant.service_router import \
+    ServiceCallRouter
+
+from .common import async_setup_remote, async_wait_for
+
+
+def _call(entity_ids):
+    return {
+        "domain": "light",
+        "service": "turn_on",
+        "service_data": {"entity_id": entity_ids, "brightness": 100},
+    }
+
+
+async def test_routing_to_connections(hass):
+    """Test calls are forwarded once to every connection owning targets."""
+    router = ServiceCallRouter(hass)
+    first = Mock(async_forward_service_call=AsyncMock())
+    second = Mock(async_forward_service_call=AsyncMock())
+    router.async_add("light.first_kitchen", "light.kitchen", first)
+    router.async_add("light.first_hall", "light.hall", first)
+    router.async_add("light.second_kitchen", "light.kitchen", second)
+
+    targets = [
+        "light.first_kitchen",
+        "Light.First_Hall",
+        "light.second_kitchen",
+        "light.local",
+    ]
+    hass.bus.async_fire(EVENT_CALL_SERVICE, _call(targets))
+    await hass.async_block_till_done()
+
+    first.async_forward_service_call.assert_awaited_once()
+    event_data, entity_ids = first.async_forward_service_call.call_args.args
+    assert event_data["service_data"]["brightness"] == 100
+    assert sorted(entity_ids) == ["light.hall", "light.kitchen"]
+    second.async_forward_service_call.assert_awaited_once()
+    assert second.async_forward_service_call.call_args.args[1] == ["light.kitchen"]
+
+
+async def test_no_remote_targets(hass):
+    """Test calls without remote targets are not forwarded."""
+    router = ServiceCallRouter(hass)
+    connection = Mock(async_forward_service_call=AsyncMock())
+    router.async_add("light.remote_kitchen", "light.kitchen", connection)
+    router.async_remove("light.remote_kitchen")
+
+    hass.bus.async_fire(EVENT_CALL_SERVICE, _call("light.remote_kitchen"))
+    hass.bus.async_fire(EVENT_CALL_SERVICE, _call("light.local"))
+    hass.bus.async_fire(EVENT_CALL_SERVICE, {**_call([]), "service_data": {}})
+    await hass.async_block_till_done()
+
+    connection.async_forward_service_call.assert_not_awaited()
+
+
+async def test_prefixed_entity(hass, fake_remote):
+    """Test calls for prefixed entities target the remote entity id."""
+    remote = await fake_remote(entities=1)
+    calls = []
+    handle = remote._handle
+
+    def record(message):
+        if message.get("type") == EVENT_CALL_SERVICE:
+            calls.append(message)
+        return handle(message)
+
+    with patch.object(remote, "_handle", record):
+        entry = await async_setup_remote(hass, remote, {CONF_ENTITY_PREFIX: "remote_"})
+        await async_wait_for(lambda: hass.states.get("sensor.remote_synthetic_0"))
+
+        hass.bus.async_fire(EVENT_CALL_SERVICE, _call("sensor.remote_synthetic_0"))
+        await async_wait_for(lambda: calls)
+
+    assert calls[0]["service_data"] == {
+        "entity_id": ["sensor.synthetic_0"],
+        "brightness": 100,
+    }
+    assert "service_call_id" not in calls[0]
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
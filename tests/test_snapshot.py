@@ -0,0 +1,59 @@
+"""Tests for the initial snapshot of remote states."""
+from homeassistant.const import EVENT_STATE_CHANGED
+
+from custom_components.remote_homeassistant.const import (CONF_RECONNECT_MODE,
+                                                          DOMAIN,
+                                                          RECONNECT_MODE_STALE,
+                                                          STORAGE_VERSION)
+
+from .common import ENTRY_ID, async_setup_remote, async_wait_for
+
+
+async def test_empty_snapshot_removes_restored(hass, hass_storage, fake_remote):
+    """Test restored entities are removed if the remote has no entities."""
+    hass_storage[f"{DOMAIN}.snapshot.{ENTRY_ID}"] = {
+        "version": STORAGE_VERSION,
+        "minor_version": 1,
+        "key": f"{DOMAIN}.snapshot.{ENTRY_ID}",
+        "data": {"entities": [["sensor.gone", "1", {}]]},
+    }
+    remote = await fake_remote(entities=0)
+
+    entry = await async_setup_remote(
+        hass, remote, {CONF_RECONNECT_MODE: RECONNECT_MODE_STALE}
+    )
+    assert hass.states.get("sensor.gone").state == "1"
+
+    await async_wait_for(lambda: hass.states.get("sensor.gone") is None)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_restore_stored_states(hass, hass_storage, fake_remote):
+    """Test stored states are published at startup and reconciled once connected."""
+    remote = await fake_remote(entities=3)
+    entry = await async_setup_remote(
+        hass, remote, {CONF_RECONNECT_MODE: RECONNECT_MODE_STALE}
+    )
+    await async_wait_for(lambda: hass.states.get("sensor.synthetic_2"))
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert hass.states.get("sensor.synthetic_0") is None
+    assert len(hass_storage[f"{DOMAIN}.snapshot.{ENTRY_ID}"]["data"]["entities"]) == 3
+
+    changes = []
+    hass.bus.async_listen(
+        EVENT_STATE_CHANGED, lambda event: changes.append(event.data["entity_id"])
+    )
+    del remote.states["sensor.synthetic_2"]
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    restored = hass.states.get("sensor.synthetic_0")
+    assert restored.state == "0"
+    assert hass.states.get("sensor.synthetic_2") is not None
+
+    await async_wait_for(lambda: hass.states.get("sensor.synthetic_2") is None)
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.synthetic_0") is restored
+    assert changes.count("sensor.synthetic_0") == 1
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,52 @@
+"""Tests for HTTP views served to other instances."""
+import json
+from unittest.mock import Mock
+
+from aiohttp import hdrs
+
+from custom_components.remote_homeassistant.views import DiscoveryInfoView
+
+
+def _request(hass, headers=None):
+    return Mock(app={"hass": hass}, headers=headers or {})
+
+
+async def test_discovery_info(hass):
+    """Test discovery info is served with an ETag."""
+    view = DiscoveryInfoView(hass)
+
+    response = await view.get(_request(hass))
+
+    assert response.status == 200
+    assert json.loads(response.text)["location_name"] == hass.config.location_name
+    assert response.headers[hdrs.ETAG].startswith('"')
+
+
+async def test_discovery_info_not_modified(hass):
+    """Test requests with a matching If-None-Match get no payload."""
+    view = DiscoveryInfoView(hass)
+    etag = (await view.get(_request(hass))).headers[hdrs.ETAG]
+
+    response = await view.get(
+        _request(hass, {hdrs.IF_NONE_MATCH: f'"other", {etag}'})
+    )
+    assert response.status == 304
+    assert response.headers[hdrs.ETAG] == etag
+    assert response.body is None
+
+    response = await view.get(_request(hass, {hdrs.IF_NONE_MATCH: '"other"'}))
+    assert response.status == 200
+
+
+async def test_discovery_info_config_update(hass):
+    """Test discovery info is rebuilt when the core config changes."""
+    view = DiscoveryInfoView(hass)
+    etag = (await view.get(_request(hass))).headers[hdrs.ETAG]
+
+    await hass.config.async_update(location_name="Holiday home")
+    await hass.async_block_till_done()
+
+    response = await view.get(_request(hass, {hdrs.IF_NONE_MATCH: etag}))
+    assert response.status == 200
+    assert response.headers[hdrs.ETAG] != etag
+    assert json.loads(response.text)["location_name"] == "Holiday home"
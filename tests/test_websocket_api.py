@@ -0,0 +1,73 @@
+"""Tests for the websocket commands of a remote node."""
+from unittest.mock import Mock
+
+from custom_components.remote_homeassistant.websocket_api import (
+    TYPE_SUBSCRIBE, TYPE_TIME, websocket_subscribe, websocket_time)
+
+
+def _connection(user):
+    return Mock(user=user, subscriptions={})
+
+
+def _subscribe(hass, connection, **options):
+    websocket_subscribe(hass, connection, {"id": 5, "type": TYPE_SUBSCRIBE, **options})
+
+
+def _events(connection):
+    return [call.args[0]["event"] for call in connection.send_message.call_args_list]
+
+
+async def test_subscribe(hass, hass_admin_user):
+    """Test the snapshot and changes of included entities are sent."""
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("sensor.power", "10", {"unit_of_measurement": "W"})
+    connection = _connection(hass_admin_user)
+    _subscribe(hass, connection, include_domains=["sensor"])
+
+    connection.send_result.assert_called_once_with(
+        5, {"entity_ids": ["light.kitchen", "sensor.power"]}
+    )
+    assert list(_events(connection)[0]["a"]) == ["sensor.power"]
+
+    hass.states.async_set("light.kitchen", "off")
+    hass.states.async_set("sensor.power", "11", {"unit_of_measurement": "W"})
+    hass.states.async_remove("sensor.power")
+    await hass.async_block_till_done()
+    events = _events(connection)[1:]
+    assert events[0]["c"]["sensor.power"]["+"]["s"] == "11"
+    assert "a" not in events[0]["c"]["sensor.power"]["+"]
+    assert events[1] == {"r": ["sensor.power"]}
+    assert len(events) == 2
+
+    connection.subscriptions[5]()
+
+
+async def test_subscribe_permissions(hass, hass_admin_user):
+    """Test users only get entities they may read."""
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("lock.door", "locked")
+    hass_admin_user.groups = []
+    hass_admin_user.mock_policy({"entities": {"entity_ids": {"light.kitchen": True}}})
+    connection = _connection(hass_admin_user)
+    _subscribe(hass, connection)
+
+    connection.send_result.assert_called_once_with(
+        5, {"entity_ids": ["light.kitchen"]}
+    )
+    assert list(_events(connection)[0]["a"]) == ["light.kitchen"]
+
+    hass.states.async_set("lock.door", "unlocked")
+    hass.states.async_set("light.kitchen", "off")
+    await hass.async_block_till_done()
+    events = _events(connection)[1:]
+    assert len(events) == 1 and list(events[0]["c"]) == ["light.kitchen"]
+
+    connection.subscriptions[5]()
+
+
+async def test_time(hass, hass_admin_user, freezer):
+    """Test the current time is returned."""
+    freezer.move_to("2024-03-01 12:00:00+00:00")
+    connection = _connection(hass_admin_user)
+    websocket_time(hass, connection, {"id": 7, "type": TYPE_TIME})
+    connection.send_result.assert_called_once_with(7, {"time": 1709294400.0})